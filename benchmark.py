@@ -0,0 +1,286 @@
+"""
+benchmark.py
+
+Benchmark suite for the simulation and data hot paths, with
+machine-readable (JSON) results and run-to-run regression checks.
+
+Suites:
+    ca      cell-updates / sec of simulation_ca.step and ca_packed.step
+            across grid sizes and noise levels
+    csv     per-farm CSV parse time (cold, no column cache), cached read
+            time and target alignment (load_farm) time
+    forest  RandomForestRegressor fit / predict time (train_and_evaluate)
+            against training rows and n_estimators
+
+Every case reports its latency distribution (min / p50 / p90 / p99 /
+mean over `repeat` timed runs after a warmup), throughput and peak traced
+memory (tracemalloc, measured in one extra untimed run).
+
+Usage:
+    python benchmark.py run [--suite ca csv forest] [--quick] [--out bench.json]
+    python benchmark.py compare base.json new.json [--threshold 0.10]
+
+compare exits with status 1 when any case's p50 got slower than
+`threshold` relative to the base run.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SUITES = ("ca", "csv", "forest")
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def measure(fn, repeat=5, warmup=1, memory=True):
+    """
+    Times fn() `repeat` times after `warmup` calls. Returns a dict of
+    latency statistics (seconds) and the peak traced memory (bytes).
+    """
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times = np.asarray(times)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min": float(times.min()),
+        "p50": float(np.percentile(times, 50)),
+        "p90": float(np.percentile(times, 90)),
+        "p99": float(np.percentile(times, 99)),
+        "mean": float(times.mean()),
+        "peak_bytes": peak,
+    }
+
+
+def result(name, params, stats, work=None, unit=None):
+    """One benchmark record; throughput = work / p50 in `unit`."""
+    row = {"name": name, "params": params, **stats}
+    if work is not None:
+        row["throughput"] = work / stats["p50"] if stats["p50"] > 0 else None
+        row["unit"] = unit
+    return row
+
+
+# -----------------------------
+# CA stepping
+# -----------------------------
+def bench_ca(sizes=(64, 256, 1024), noise=(0.0, 0.02, 0.05), steps=10, repeat=5):
+    import ca_packed
+    import simulation_ca
+
+    engines = {"simulation_ca": simulation_ca.step, "ca_packed": ca_packed.step}
+    rows = []
+    for size in sizes:
+        np.random.seed(0)
+        grid = (np.random.rand(size, size) < 0.18).astype(int)
+        for p in noise:
+            for engine, step in engines.items():
+                def run():
+                    g = grid
+                    for _ in range(steps):
+                        g = step(g, 3, p)
+
+                stats = measure(run, repeat)
+                rows.append(result(f"ca.step.{engine}", {"size": size, "p_noise": p, "steps": steps},
+                                   stats, size * size * steps, "cell-updates/s"))
+    return rows
+
+
+# -----------------------------
+# CSV parse + alignment
+# -----------------------------
+def bench_csv(farms=range(1, 8), repeat=3):
+    from ml_data import DATA_DIR, load_farm, load_targets, read_table
+
+    targets = load_targets()
+    rows = []
+    for farm in farms:
+        path = Path(DATA_DIR) / f"windforecasts_wf{farm}.csv"
+        n = len(read_table(path)["date"])
+
+        stats = measure(lambda: read_table(path, cache=False), repeat)
+        rows.append(result("csv.parse", {"farm": farm}, stats, n, "rows/s"))
+
+        stats = measure(lambda: read_table(path), repeat)
+        rows.append(result("csv.cached_read", {"farm": farm}, stats, n, "rows/s"))
+
+        stats = measure(lambda: load_farm(farm, targets=targets), repeat)
+        rows.append(result("csv.align", {"farm": farm}, stats, n, "rows/s"))
+    return rows
+
+
+# -----------------------------
+# Forest fit / predict
+# -----------------------------
+def bench_forest(n_rows=(2000, 8000, 32000), n_estimators=(10, 30, 70), n_predict=10000,
+                 repeat=3):
+    from ml_data import load_farm
+    from simulation_ml import train_and_evaluate
+
+    X, y = load_farm(1).select()
+    X_val, y_val = X[-n_predict:], y[-n_predict:]
+    rows = []
+    for n in n_rows:
+        X_tr, y_tr = X[:n], y[:n]
+        for trees in n_estimators:
+            fit, pred = [], []
+
+            def run():
+                timings = {}
+                train_and_evaluate(X_tr, y_tr, X_val, y_val, n_estimators=trees, n_jobs=1,
+                                   timings=timings)
+                fit.append(timings["fit"])
+                pred.append(timings["predict"])
+
+            stats = measure(run, repeat)
+            params = {"rows": n, "n_estimators": trees}
+            # split the timed runs (skip warmup and the tracemalloc run) into fit / predict
+            for name, ts, work in (("fit", fit, n), ("predict", pred, len(X_val))):
+                ts = np.asarray(ts[1:1 + repeat])
+                part = dict(stats, min=float(ts.min()), p50=float(np.percentile(ts, 50)),
+                            p90=float(np.percentile(ts, 90)), p99=float(np.percentile(ts, 99)),
+                            mean=float(ts.mean()))
+                rows.append(result(f"forest.{name}", params, part, work, "rows/s"))
+    return rows
+
+
+# -----------------------------
+# Runs + comparison
+# -----------------------------
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_suites(suites=SUITES, quick=False):
+    kw = {
+        "ca": dict(sizes=(64, 256), noise=(0.0, 0.02), repeat=3) if quick else {},
+        "csv": dict(farms=(1,), repeat=2) if quick else {},
+        "forest": dict(n_rows=(2000, 8000), n_estimators=(10, 30), repeat=2) if quick else {},
+    }
+    funcs = {"ca": bench_ca, "csv": bench_csv, "forest": bench_forest}
+    results = []
+    for s in suites:
+        results += funcs[s](**kw[s])
+    return {"env": environment(), "results": results}
+
+
+def case_key(row):
+    return row["name"] + json.dumps(row["params"], sort_keys=True)
+
+
+COMPARE_COLUMNS = ["name", "params", "base_p50", "new_p50", "ratio", "regression"]
+
+
+def compare(base, new, threshold=0.10):
+    """
+    Joins two runs on (name, params). ratio = new p50 / base p50;
+    regression when ratio > 1 + threshold.
+
+    Returns (table, added, removed): the joined cases (always with
+    COMPARE_COLUMNS, even when empty) and the "name params" labels of the
+    cases found only in `new` / only in `base`.
+    """
+    b = {case_key(r): r for r in base["results"]}
+    n = {case_key(r): r for r in new["results"]}
+    rows = []
+    for key, r in n.items():
+        old = b.get(key)
+        if old is None:
+            continue
+        ratio = r["p50"] / old["p50"] if old["p50"] > 0 else float("inf")
+        rows.append({
+            "name": r["name"],
+            "params": json.dumps(r["params"], sort_keys=True),
+            "base_p50": old["p50"],
+            "new_p50": r["p50"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+
+    def label(r):
+        return f"{r['name']} {json.dumps(r['params'], sort_keys=True)}"
+
+    added = [label(r) for key, r in n.items() if key not in b]
+    removed = [label(r) for key, r in b.items() if key not in n]
+    table = pd.DataFrame(rows, columns=COMPARE_COLUMNS).astype({"regression": bool})
+    return table, added, removed
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulation / data benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run_p = sub.add_parser("run")
+    run_p.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    run_p.add_argument("--quick", action="store_true", help="smaller grid of cases")
+    run_p.add_argument("--out", default="bench.json")
+
+    cmp_p = sub.add_parser("compare")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.cmd == "run":
+        report = run_suites(args.suite, args.quick)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        table = pd.DataFrame(report["results"])
+        print(table[["name", "params", "p50", "p99", "throughput", "unit"]].to_string(index=False))
+        print("Saved:", args.out)
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        table, added, removed = compare(base, new, args.threshold)
+        if len(table):
+            print(table.to_string(index=False))
+        else:
+            print("No cases in common.")
+        for title, cases in (("Only in new", added), ("Only in base", removed)):
+            if cases:
+                print(f"{title} ({len(cases)}):")
+                for c in cases:
+                    print("  " + c)
+        sys.exit(1 if table["regression"].any() else 0)
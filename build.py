@@ -0,0 +1,250 @@
+"""
+build.py
+
+Cached task graph for the demo plots (demo_run.py) and the report
+figures (images.py).
+
+Each node is a plain function "module:function" called with the results
+of its dependencies and its params; a node with an `output` also gets
+path=<repo>/<output>. Nodes are keyed by a sha256 over
+
+- the source of the node function and of any extra `code` files
+- its params and the keys of its dependencies
+- the content of its `inputs` (data files)
+
+and skipped when plots/.build/<node>.json holds the same key and the
+output file still has the digest recorded there; the node's return
+value is kept next to it (pickle) for dependants. Outputs are relative
+to the repository root: demo plots go to plots/, the report figures to
+the root next to the README. Stale nodes whose dependencies are ready
+run in parallel on a process pool with the Agg backend.
+
+    python build.py                      # everything
+    python build.py rmse_plot recovery_times --workers 2
+    python build.py --force              # ignore the cache
+
+While tracing (instrument.py, SIM_TRACE) everything runs in this process
+and nothing is taken from the cache, so the trace covers every node.
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+BASE = Path(__file__).parent
+PLOTS = BASE / "plots"
+STAMPS = PLOTS / ".build"
+
+
+# -----------------------------
+# Graph
+# -----------------------------
+class Task:
+    def __init__(self, name, func, deps=(), output=None, code=(), inputs=(), params=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.output = output
+        self.code = tuple(code)
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+
+
+DEMO = [
+    Task("ml_data", "demo_run:make_ml_data"),
+    Task("ml_train", "demo_run:train_ml", deps=["ml_data"], code=["simulation_ml.py"]),
+    Task("rmse_plot", "demo_run:plot_rmse", deps=["ml_train"], output="plots/rmse_plot.png"),
+    Task("ca_run", "demo_run:run_ca_sim", code=["simulation_ca.py", "ca_packed.py"]),
+    Task("ca_heatmap", "demo_run:plot_ca", deps=["ca_run"], output="plots/ca_evolution.png"),
+]
+
+IMAGES = [
+    Task("system_context", "images:system_context", output="system_context_diagram.png"),
+    Task("failure_propagation", "images:failure_propagation", output="failure_propagation.png"),
+    Task("ml_sweep", "ml_sweep:run_sweep",
+         code=["ml_sweep.py", "simulation_ml.py", "ml_data.py"],
+         inputs=["data/train.csv", "data/windforecasts_wf1.csv"]),
+    Task("bifurcation", "images:bifurcation", deps=["ml_sweep"], output="bifurcation_diagram.png",
+         code=["ml_sweep.py"]),
+    Task("ca_recovery", "ca_recovery:recovery_table", code=["ca_recovery.py", "ca_packed.py"],
+         params=dict(noise_levels=[0.01, 0.02, 0.05], domains=(1, 4), replicas=20,
+                     max_workers=1)),
+    Task("recovery_times", "images:recovery_times", deps=["ca_recovery"],
+         output="recovery_times.png", code=["ca_recovery.py"]),
+    Task("system_architecture", "images:system_architecture", output="system_architecture.png"),
+]
+
+ALL = DEMO + IMAGES
+
+
+def resolve(func):
+    module, name = func.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def select(tasks, targets):
+    """`targets` and everything they depend on, in graph order."""
+    by_name = {t.name: t for t in tasks}
+    keep = set()
+
+    def visit(name):
+        if name not in keep:
+            keep.add(name)
+            for d in by_name[name].deps:
+                visit(d)
+
+    for name in targets:
+        visit(name)
+    return [t for t in tasks if t.name in keep]
+
+
+# -----------------------------
+# Keys + cache
+# -----------------------------
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(BASE / path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def task_key(task, dep_keys):
+    spec = {
+        "name": task.name,
+        "source": inspect.getsource(resolve(task.func)),
+        "code": {c: file_digest(c) for c in task.code},
+        "inputs": {i: file_digest(i) for i in task.inputs},
+        "params": task.params,
+        "output": task.output,
+        "deps": [dep_keys[d] for d in task.deps],
+    }
+    blob = json.dumps(spec, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def is_fresh(task, key):
+    try:
+        with open(STAMPS / f"{task.name}.json") as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if stamp.get("key") != key or not (STAMPS / f"{task.name}.pkl").exists():
+        return False
+    # the artifact must still be the one this key produced
+    return task.output is None or (
+        (BASE / task.output).exists() and file_digest(task.output) == stamp.get("digest"))
+
+
+def load_value(task):
+    with open(STAMPS / f"{task.name}.pkl", "rb") as f:
+        return pickle.load(f)
+
+
+def save_value(task, key, value, seconds):
+    STAMPS.mkdir(parents=True, exist_ok=True)
+    tmp = STAMPS / f".{task.name}.{os.getpid()}.pkl"
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f)
+    os.replace(tmp, STAMPS / f"{task.name}.pkl")
+    with open(STAMPS / f"{task.name}.json", "w") as f:
+        json.dump({"key": key, "output": task.output, "seconds": seconds,
+                   "digest": file_digest(task.output) if task.output else None}, f)
+
+
+# -----------------------------
+# Execution
+# -----------------------------
+def execute(func, args, params, output):
+    """Runs one node (in a worker); returns (value, seconds)."""
+    t0 = time.perf_counter()
+    kwargs = dict(params)
+    if output is not None:
+        kwargs["path"] = BASE / output
+    value = resolve(func)(*args, **kwargs)
+    return value, time.perf_counter() - t0
+
+
+def run(tasks=ALL, targets=None, workers=None, force=False, verbose=True):
+    """
+    Brings every node of `tasks` (or just `targets` and their
+    dependencies) up to date. Returns {node name: value}.
+    """
+    import instrument
+
+    tasks = select(tasks, targets) if targets else list(tasks)
+    PLOTS.mkdir(exist_ok=True)
+    if instrument.enabled():
+        # spans are only recorded in this process, and cached nodes record none
+        workers = 1
+        force = True
+
+    keys = {}
+    for t in tasks:
+        keys[t.name] = task_key(t, keys)
+    stale = {t.name for t in tasks if force or not is_fresh(t, keys[t.name])}
+
+    values = {}
+    for t in tasks:
+        if t.name not in stale:
+            values[t.name] = load_value(t)
+            if verbose:
+                print(f"  cached  {t.name}")
+
+    def finish(t, value, seconds):
+        values[t.name] = value
+        save_value(t, keys[t.name], value, seconds)
+        if verbose:
+            print(f"  built   {t.name} ({seconds:.2f}s)")
+
+    todo = [t for t in tasks if t.name in stale]
+    workers = workers or min(len(todo), os.cpu_count() or 1) or 1
+    if workers == 1:
+        for t in todo:
+            finish(t, *execute(t.func, [values[d] for d in t.deps], t.params, t.output))
+        return values
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=matplotlib.use,
+                             initargs=("Agg",)) as pool:
+        running = {}
+        while todo or running:
+            for t in [t for t in todo if all(d in values for d in t.deps)]:
+                todo.remove(t)
+                fut = pool.submit(execute, t.func, [values[d] for d in t.deps], t.params,
+                                  t.output)
+                running[fut] = t
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                finish(running.pop(fut), *fut.result())
+    return values
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build demo plots and report figures")
+    parser.add_argument("targets", nargs="*", help="node names (default: all)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="rebuild even if cached")
+    parser.add_argument("--list", action="store_true", help="list nodes and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for t in ALL:
+            print(f"{t.name:20s} <- {', '.join(t.deps) or '-':20s} {t.output or ''}")
+    else:
+        t0 = time.perf_counter()
+        run(ALL, args.targets or None, args.workers, args.force)
+        print(f"Done in {time.perf_counter() - t0:.1f}s")
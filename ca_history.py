@@ -0,0 +1,237 @@
+"""
+ca_history.py
+
+Compressed on-disk history of long CA runs with random-access replay.
+
+Generations are stored bit-packed (ca_packed) as
+- a keyframe (the full grid) every `keyframe_every` generations
+- otherwise the XOR delta against the previous generation
+
+Each frame is cut into bands of `band_rows` rows and every band is
+zlib-compressed on its own; bands that did not change at all take no
+space. Layout of a history folder:
+
+    meta.json    height, width, keyframe_every, band_rows
+    data.bin     compressed band blobs, append-only
+    index.bin    int64 (offset, length) per (generation, band), append-only
+
+Both files are memory-mapped when reading. Reading generation g for some
+rows decodes only the bands covering those rows, from the keyframe at or
+before g; sequential replay reuses the previous state, so it costs one
+delta per generation. Disk use grows with how much actually changes.
+"""
+
+import json
+import mmap
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from ca_packed import n_words, pack, popcount, step_packed, unpack
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+class HistoryWriter:
+    def __init__(self, path, height, width, keyframe_every=64, band_rows=256, level=6):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.height = height
+        self.width = width
+        self.keyframe_every = keyframe_every
+        self.band_rows = band_rows
+        self.level = level
+        self.bands = [(r0, min(height, r0 + band_rows)) for r0 in range(0, height, band_rows)]
+
+        meta = {"height": height, "width": width, "keyframe_every": keyframe_every,
+                "band_rows": band_rows}
+        with open(self.path / "meta.json", "w") as f:
+            json.dump(meta, f)
+        self.data = open(self.path / "data.bin", "wb")
+        self.index = open(self.path / "index.bin", "wb")
+        self.offset = 0
+        self.prev = None
+        self.n_generations = 0
+
+    def append(self, grid=None, words=None):
+        """Adds one generation, given dense (grid) or packed (words)."""
+        if words is None:
+            words = pack(np.asarray(grid))
+        key = self.n_generations % self.keyframe_every == 0
+        frame = words if key else words ^ self.prev
+
+        entries = np.zeros((len(self.bands), 2), dtype=np.int64)
+        for b, (r0, r1) in enumerate(self.bands):
+            band = frame[r0:r1]
+            if not key and not band.any():
+                continue
+            blob = zlib.compress(np.ascontiguousarray(band).tobytes(), self.level)
+            self.data.write(blob)
+            entries[b] = self.offset, len(blob)
+            self.offset += len(blob)
+
+        self.index.write(entries.tobytes())
+        self.prev = words.copy()
+        self.n_generations += 1
+
+    def flush(self):
+        self.data.flush()
+        self.index.flush()
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# -----------------------------
+# Reader
+# -----------------------------
+class HistoryReader:
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "meta.json") as f:
+            meta = json.load(f)
+        self.height = meta["height"]
+        self.width = meta["width"]
+        self.keyframe_every = meta["keyframe_every"]
+        self.band_rows = meta["band_rows"]
+        self.n_bands = -(-self.height // self.band_rows)
+        self.n_words = n_words(self.width)
+
+        self._file = open(self.path / "data.bin", "rb")
+        size = (self.path / "data.bin").stat().st_size
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        index = np.memmap(self.path / "index.bin", dtype=np.int64, mode="r") \
+            if (self.path / "index.bin").stat().st_size else np.zeros(0, dtype=np.int64)
+        # a partially written last generation is ignored
+        per_gen = self.n_bands * 2
+        self.index = index[:len(index) // per_gen * per_gen].reshape(-1, self.n_bands, 2)
+        self._state = None          # (generation, band_lo, band_hi, words)
+
+    @property
+    def n_generations(self):
+        return len(self.index)
+
+    def _band(self, g, b):
+        """Decoded keyframe band or delta band b of generation g."""
+        r0 = b * self.band_rows
+        rows = min(self.height, r0 + self.band_rows) - r0
+        offset, length = self.index[g, b]
+        if length == 0:
+            return np.zeros((rows, self.n_words), dtype=np.uint64)
+        raw = zlib.decompress(self.data[offset:offset + length])
+        return np.frombuffer(raw, dtype=np.uint64).reshape(rows, self.n_words)
+
+    def _bands(self, g, lo, hi):
+        return np.concatenate([self._band(g, b) for b in range(lo, hi)])
+
+    def words(self, g, rows=slice(None)):
+        """Packed rows `rows` of generation g (only the covering bands are decoded)."""
+        if not 0 <= g < self.n_generations:
+            raise IndexError(f"generation {g} out of range 0..{self.n_generations - 1}")
+        r0, r1, _ = rows.indices(self.height)
+        lo, hi = r0 // self.band_rows, -(-r1 // self.band_rows)
+        key = g - g % self.keyframe_every
+
+        s = self._state
+        if s is not None and s[1] == lo and s[2] == hi and key <= s[0] <= g:
+            start, state = s[0], s[3].copy()
+        else:
+            start, state = key, self._bands(key, lo, hi)
+        for t in range(start + 1, g + 1):
+            state ^= self._bands(t, lo, hi)
+        self._state = (g, lo, hi, state)
+
+        base = lo * self.band_rows
+        return state[r0 - base:r1 - base].copy()
+
+    def frame(self, g, rows=slice(None), cols=slice(None)):
+        """Dense uint8 region of generation g."""
+        return unpack(self.words(g, rows), self.width, dtype=np.uint8)[:, cols]
+
+    def region(self, generations, rows=slice(None), cols=slice(None)):
+        """(T, h, w) uint8 time-slice of a region, replayed sequentially."""
+        return np.stack([self.frame(g, rows, cols) for g in generations])
+
+    def diff(self, g, rows=slice(None)):
+        """Packed cells that flipped between generation g-1 and g."""
+        r0, r1, _ = rows.indices(self.height)
+        lo, hi = r0 // self.band_rows, -(-r1 // self.band_rows)
+        base = lo * self.band_rows
+        if g % self.keyframe_every:
+            return self._bands(g, lo, hi)[r0 - base:r1 - base]
+        return self.words(g, rows) ^ self.words(g - 1, rows)
+
+    def flips(self):
+        """Number of flipped cells per generation (0 for generation 0)."""
+        out = np.zeros(self.n_generations, dtype=np.int64)
+        for g in range(1, self.n_generations):
+            out[g] = popcount(self.diff(g))
+        return out
+
+    def nbytes(self):
+        return (self.path / "data.bin").stat().st_size + (self.path / "index.bin").stat().st_size
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# -----------------------------
+# Recording a run
+# -----------------------------
+def record_ca(initial_grid, path, steps=40, thresh=3, p_noise=0.02, **writer_kw):
+    """
+    Runs the CA with ca_packed (bit-identical to simulation_ca.run_ca for
+    the same np.random seed) and stores all steps + 1 generations.
+    """
+    initial_grid = np.asarray(initial_grid)
+    height, width = initial_grid.shape
+    g = pack(initial_grid)
+    with HistoryWriter(path, height, width, **writer_kw) as w:
+        w.append(words=g)
+        for _ in range(steps):
+            g = step_packed(g, width, thresh, p_noise)
+            w.append(words=g)
+    return HistoryReader(path)
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    np.random.seed(0)
+    size, steps = 2048, 200
+    init = (np.random.rand(size, size) < 0.18).astype(int)
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        hist = record_ca(init, Path(tmp) / "run", steps=steps, p_noise=0.001)
+        t1 = time.perf_counter()
+        dense = hist.n_generations * size * size
+        print(f"recorded {hist.n_generations} generations in {t1 - t0:.1f}s, "
+              f"{hist.nbytes() / 1e6:.1f} MB on disk (dense int8: {dense / 1e6:.0f} MB)")
+
+        t0 = time.perf_counter()
+        hist.frame(steps // 2 + 7, rows=slice(100, 200), cols=slice(100, 200))
+        print(f"random access to a 100x100 region: {1e3 * (time.perf_counter() - t0):.1f} ms")
+        hist.close()
@@ -0,0 +1,167 @@
+"""
+ca_recovery.py
+
+Measured recovery-time / fault-isolation experiments for Workshop 4.
+Replaces the hand-written recovery numbers in images.py with runs of the
+CA (ca_packed engine, same rules as simulation_ca.step):
+
+1. evolve a random grid to its live steady state (thresh=4 from
+   init_density=0.9: almost every cell up, minus the noise) and record
+   the pre-failure density
+2. knock out a square block of cells (set them to 0) in a copy of it
+3. step both copies with the same noise until the failed copy is back
+   at the pre-failure density
+
+The rule is bistable: it either settles in this live state or dies out
+to density ~ p_noise; there is no steady state in between. The live
+state is the one with something to recover.
+
+Fault isolation splits the torus into rectangular domains; neighbours
+across a domain border are not coupled (they never count), so cells on
+a border have fewer live neighbours to grow back from.
+
+The recovery time is the first step from which the density stays within
+`tol` of the pre-failure density for `window` steps. The damage, the
+cells where the two copies differ, is tracked as well: if it reaches
+`fail_fraction` of the grid the failure has taken over and the recovery
+time is inf, as it is when max_steps pass without recovery.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ca_packed import OFFSETS, apply_noise, pack, popcount, step_packed, unpack
+
+
+# -----------------------------
+# Fault domains
+# -----------------------------
+def domain_ids(shape, domains=1):
+    """
+    Integer domain id per cell. `domains` is the number of strips per axis
+    (an int) or a (row_strips, col_strips) pair; 1 means no isolation.
+    """
+    h, w = shape
+    dr, dc = (domains, domains) if np.isscalar(domains) else domains
+    rows = np.arange(h) * dr // h
+    cols = np.arange(w) * dc // w
+    return rows[:, None] * dc + cols[None, :]
+
+
+def domain_masks(shape, domains=1):
+    """Packed neighbour masks for ca_packed.neighbour_count (None if no isolation)."""
+    ids = domain_ids(shape, domains)
+    if ids.max() == 0:
+        return None
+    return [pack(ids == np.roll(ids, off, axis=(0, 1))) for off in OFFSETS]
+
+
+# -----------------------------
+# Perturbation
+# -----------------------------
+def inject_block(grid, block, rng, value=0):
+    """Sets a random `block` x `block` square (with wrap) to `value` (0: knocked out)."""
+    h, w = grid.shape
+    r0, c0 = rng.integers(h), rng.integers(w)
+    rows = (r0 + np.arange(block)) % h
+    cols = (c0 + np.arange(block)) % w
+    out = grid.copy()
+    out[np.ix_(rows, cols)] = value
+    return out
+
+
+# -----------------------------
+# One recovery experiment
+# -----------------------------
+def recovery_experiment(size=60, thresh=4, p_noise=0.02, domains=1, init_density=0.9,
+                        warmup=50, block=15, window=5, tol=0.01, fail_fraction=0.5,
+                        max_steps=500, seed=0):
+    """
+    Returns a dict with the pre-failure (baseline) density, the density
+    right after the failure, the damaged fraction right after it, at its
+    peak and at the end, and the measured recovery time in steps (inf if
+    the system did not get back to the baseline).
+    """
+    rng = np.random.default_rng(seed)
+    shape = (size, size)
+    masks = domain_masks(shape, domains)
+    cells = size * size
+
+    g = pack(rng.random(shape) < init_density)
+    density = []
+    for _ in range(warmup):
+        g = step_packed(g, size, thresh, p_noise, masks, rng)
+        density.append(popcount(g) / cells)
+    baseline = float(np.mean(density[-window:]))
+
+    # healthy and failed copy, stepped together and flipped by the same noise
+    pair = np.stack([g, pack(inject_block(unpack(g, size), block, rng, value=0))])
+    perturbed = popcount(pair[1]) / cells
+    damage = [popcount(pair[0] ^ pair[1]) / cells]
+    recent = deque(maxlen=window)
+    recovery = float("inf")
+    for t in range(1, max_steps + 1):
+        pair = step_packed(pair, size, thresh, 0, masks)
+        if p_noise > 0:
+            pair ^= apply_noise(np.zeros_like(g), size, p_noise, rng)
+        damage.append(popcount(pair[0] ^ pair[1]) / cells)
+        recent.append(popcount(pair[1]) / cells)
+
+        if damage[-1] >= fail_fraction:
+            break
+        if len(recent) == window and max(abs(d - baseline) for d in recent) <= tol:
+            recovery = t - window + 1
+            break
+
+    return dict(
+        size=size, thresh=thresh, p_noise=p_noise, domains=domains, seed=seed,
+        baseline_density=baseline, perturbed_density=perturbed, injected=damage[0],
+        peak_damage=max(damage), final_damage=damage[-1], recovery_time=recovery,
+        steps_run=len(damage) - 1,
+    )
+
+
+def _run(kwargs):
+    return recovery_experiment(**kwargs)
+
+
+# -----------------------------
+# Batch of experiments
+# -----------------------------
+def recovery_table(noise_levels=(0.01, 0.02, 0.05), domains=(1, 4), replicas=20,
+                   max_workers=None, **kwargs):
+    """
+    Runs `replicas` experiments per (p_noise, domains) pair on a process
+    pool (max_workers=1 runs them serially in this process).
+    Returns the per-run DataFrame; see recovery_summary().
+    """
+    jobs = [dict(kwargs, p_noise=p, domains=d, seed=s)
+            for p in noise_levels for d in domains for s in range(replicas)]
+
+    if max_workers == 1:
+        rows = [_run(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            rows = list(pool.map(_run, jobs, chunksize=max(1, len(jobs) // 64)))
+
+    return pd.DataFrame(rows)
+
+
+def recovery_summary(df):
+    """
+    Median recovery time per (p_noise, domains); inf when most runs never
+    recover, which is how images.py plots "never recovers".
+    """
+    return df.groupby(["p_noise", "domains"])["recovery_time"].median().unstack("domains")
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    df = recovery_table()
+    print(recovery_summary(df))
@@ -0,0 +1,178 @@
+"""
+ca_sweep.py
+
+Parallel parameter sweep for the Workshop 4 cellular automaton.
+Runs every (thresh, p_noise, init_density, size, replica) cell of a grid
+on a process pool and keeps only compact summary metrics per run, which
+is what phase / bifurcation diagrams need.
+
+- seeds are derived from the cell parameters, so results do not depend
+  on worker count or completion order
+- each finished cell is appended to a JSON-lines checkpoint; an
+  interrupted sweep picks up where it left off
+- runs use ca_packed, which is bit-identical to simulation_ca.run_ca
+"""
+
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ca_packed import pack, popcount, step_packed
+
+PARAMS = ("thresh", "p_noise", "init_density", "size", "replica")
+
+
+# -----------------------------
+# Parameter grid + seeding
+# -----------------------------
+def param_grid(thresh=(3,), p_noise=(0.0, 0.02, 0.05), init_density=(0.18,),
+               size=(60,), replicas=1):
+    return [dict(zip(PARAMS, (v.item() if isinstance(v, np.generic) else v for v in values)))
+            for values in itertools.product(thresh, p_noise, init_density, size, range(replicas))]
+
+
+def cell_key(params):
+    return json.dumps([params[k] for k in PARAMS])
+
+
+RUN = ("steps", "n_tail", "seed")
+
+
+def run_key(params, steps, tail, seed):
+    """Checkpoint key: the cell plus the run settings that shape its result."""
+    return json.dumps([params[k] for k in PARAMS] + [steps, tail, seed])
+
+
+def row_key(row):
+    return run_key(row, *(row[k] for k in RUN))
+
+
+def cell_seed(params, seed=0):
+    """Deterministic 32-bit seed for np.random.seed from the cell parameters."""
+    digest = hashlib.sha256(f"{seed}:{cell_key(params)}".encode()).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+# -----------------------------
+# One sweep cell (runs in a worker)
+# -----------------------------
+def run_cell(params, steps=200, tail=20, seed=0):
+    """
+    Runs one CA and returns summary metrics only:
+    final / mean / std density over the last `tail` generations, mean flip
+    rate over the same window and the tail densities themselves
+    (the attractor samples plotted in a bifurcation diagram).
+    """
+    np.random.seed(cell_seed(params, seed))
+    size = params["size"]
+    cells = size * size
+    grid = (np.random.rand(size, size) < params["init_density"]).astype(int)
+
+    g = pack(grid)
+    density = [popcount(g) / cells]
+    flips = []
+    for _ in range(steps):
+        new = step_packed(g, size, params["thresh"], params["p_noise"])
+        flips.append(popcount(new ^ g) / cells)
+        density.append(popcount(new) / cells)
+        g = new
+
+    window = np.array(density[-tail:])
+    return dict(
+        params,
+        steps=steps,
+        n_tail=tail,
+        seed=seed,
+        final_density=density[-1],
+        mean_density=float(window.mean()),
+        std_density=float(window.std()),
+        flip_rate=float(np.mean(flips[-tail:])) if flips else 0.0,
+        tail=[round(d, 6) for d in window],
+    )
+
+
+# -----------------------------
+# Checkpoint helpers
+# -----------------------------
+def load_checkpoint(path):
+    done = {}
+    if path is not None and Path(path).exists():
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                    done[row_key(row)] = row
+                except (json.JSONDecodeError, KeyError):
+                    # partial line from an interrupted write, or a row
+                    # without its run settings (rerun)
+                    continue
+    return done
+
+
+# -----------------------------
+# Sweep driver
+# -----------------------------
+def run_sweep(cells, steps=200, tail=20, seed=0, checkpoint=None, max_workers=None):
+    """
+    Runs every cell in `cells` (see param_grid) across a process pool.
+    Cells already present in `checkpoint` with the same steps, tail and
+    seed are not rerun. Returns a DataFrame with one row per cell.
+    """
+    done = load_checkpoint(checkpoint)
+    todo = [c for c in cells if run_key(c, steps, tail, seed) not in done]
+    out = open(checkpoint, "a") if checkpoint is not None else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            futures = [pool.submit(run_cell, c, steps, tail, seed) for c in todo]
+            for fut in as_completed(futures):
+                row = fut.result()
+                done[row_key(row)] = row
+                if out is not None:
+                    out.write(json.dumps(row) + "\n")
+                    out.flush()
+    finally:
+        if out is not None:
+            out.close()
+
+    rows = [done[run_key(c, steps, tail, seed)] for c in cells]
+    return pd.DataFrame(rows)
+
+
+# -----------------------------
+# Bifurcation diagram from a sweep
+# -----------------------------
+def plot_bifurcation(df, x="p_noise", path="plots/ca_bifurcation.png"):
+    import matplotlib.pyplot as plt
+
+    xs = np.repeat(df[x].to_numpy(), df["tail"].map(len).to_numpy())
+    ys = np.concatenate(df["tail"].to_list())
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(xs, ys, "b.", markersize=3, alpha=0.5)
+    plt.title(f"CA Bifurcation Diagram: Density vs. {x}")
+    plt.xlabel(x)
+    plt.ylabel("Live-cell density (last generations)")
+    plt.grid(True, linestyle="--", alpha=0.7)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    cells = param_grid(thresh=(3, 4), p_noise=np.round(np.linspace(0, 0.1, 21), 3).tolist(),
+                       replicas=4)
+    df = run_sweep(cells, steps=100, checkpoint="plots/ca_sweep.jsonl")
+    print(df.groupby(["thresh", "p_noise"])["mean_density"].mean().unstack(0))
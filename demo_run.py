@@ -1,16 +1,23 @@
 """
 demo_run.py
 Runs a synthetic demo for ML + CA simulations.
-Generates:
+Generates (as cached nodes of the build.py task graph):
 - plots/rmse_plot.png
 - plots/ca_evolution.png
+
+--trace PATH (or SIM_TRACE=PATH) writes a stage profile, see instrument.py;
+tracing rebuilds every node, so the profile is never empty.
 """
 
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
+import instrument
+from instrument import span
 from simulation_ml import train_and_evaluate
-from simulation_ca import run_ca
+from simulation_ca import run_ca_stats
 
 # -----------------------------
 # Output folders
@@ -22,56 +29,84 @@ PLOTS.mkdir(exist_ok=True)
 # -----------------------------
 # ML Demo
 # -----------------------------
-def run_ml_demo():
-    n = 1000
-    np.random.seed(0)
+def make_ml_data(n=1000, seed=0):
+    np.random.seed(seed)
     X = np.random.randn(n, 5)
     y = np.sin(X[:, 0]) + 0.3*X[:, 1]**2 - 0.15*X[:, 2] + 0.1*np.random.randn(n)
+    return X, y
+
 
-    split = int(n * 0.75)
+def train_ml(data, split=0.75):
+    X, y = data
+    split = int(len(X) * split)
     X_train, X_val = X[:split], X[split:]
     y_train, y_val = y[:split], y[split:]
 
     score, model = train_and_evaluate(X_train, y_train, X_val, y_val)
+    return score
+
+
+def plot_rmse(score, path=PLOTS / "rmse_plot.png"):
+    with span("plot", file=Path(path).name):
+        plt.figure()
+        plt.plot([0, 1], [score, score], label=f"RMSE={score:.4f}")
+        plt.title("Synthetic ML RMSE")
+        plt.legend()
+        plt.savefig(path)
+        plt.close()
 
-    # RMSE plot
-    plt.figure()
-    plt.plot([0, 1], [score, score], label=f"RMSE={score:.4f}")
-    plt.title("Synthetic ML RMSE")
-    plt.legend()
-    plt.savefig(PLOTS / "rmse_plot.png")
-    plt.close()
 
+def run_ml_demo():
+    score = train_ml(make_ml_data())
+    plot_rmse(score)
     return score
 
 # -----------------------------
 # CA Demo
 # -----------------------------
-def run_ca_demo():
-    np.random.seed(2)
-    init = (np.random.rand(60, 60) < 0.18).astype(int)
-    grids = run_ca(init, steps=40, thresh=3, p_noise=0.02)
+def run_ca_sim(size=60, steps=40, seed=2):
+    np.random.seed(seed)
+    init = (np.random.rand(size, size) < 0.18).astype(int)
+    stats = run_ca_stats(init, steps=steps, thresh=3, p_noise=0.02)
+
+    # evolution heatmap (accumulated while streaming)
+    return stats.visits
 
-    # evolution heatmap
-    evolution = sum(grids)
 
-    plt.figure(figsize=(6, 5))
-    plt.imshow(evolution, origin="lower")
-    plt.title("CA Visit Count Heatmap")
-    plt.colorbar()
-    plt.savefig(PLOTS / "ca_evolution.png")
-    plt.close()
+def plot_ca(evolution, path=PLOTS / "ca_evolution.png"):
+    with span("plot", file=Path(path).name):
+        plt.figure(figsize=(6, 5))
+        plt.imshow(evolution, origin="lower")
+        plt.title("CA Visit Count Heatmap")
+        plt.colorbar()
+        plt.savefig(path)
+        plt.close()
 
+
+def run_ca_demo():
+    evolution = run_ca_sim()
+    plot_ca(evolution)
     return evolution
 
 # -----------------------------
 # MAIN
 # -----------------------------
 if __name__ == "__main__":
-    print("Running ML demo...")
-    rmse = run_ml_demo()
-    print("ML RMSE:", rmse)
+    parser = argparse.ArgumentParser(description="ML + CA simulation demo")
+    parser.add_argument("--trace", help="write a stage profile (.json trace or folded stacks); "
+                                        "implies --force")
+    parser.add_argument("--trace-memory", action="store_true", help="add tracemalloc bytes per stage")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size for the task graph (1: run in this process)")
+    parser.add_argument("--force", action="store_true", help="ignore cached plots")
+    args = parser.parse_args()
+    if args.trace:
+        # spans are recorded in this process only; build.run also ignores the cache
+        instrument.enable(args.trace, memory=args.trace_memory)
+        args.workers = 1
+
+    from build import DEMO, run
 
-    print("Running CA demo...")
-    evo = run_ca_demo()
-    print("CA evolution shape:", evo.shape)
+    results = run(DEMO, workers=args.workers, force=args.force)
+    print("ML RMSE:", results["ml_train"])
+    print("CA evolution shape:", results["ca_run"].shape)
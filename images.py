@@ -1,507 +1,472 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.lines import Line2D
-import numpy as np
+"""
+images.py
+
+Report figures. Every figure is one function drawing into `path`;
+build.py runs them (and the demo_run.py plots) as cached nodes of one
+task graph, so `python images.py` only redraws figures whose code or
+inputs changed.
+"""
 
-# SYSTEM CONTEXT
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from matplotlib.font_manager import FontProperties
+import matplotlib.lines as mlines
 import numpy as np
 
-# Create figure with ample space
-plt.figure(figsize=(14, 10))
-
-# Define colors with better contrast
-system_color = '#2c3e50'  # Dark blue-gray for system boundary
-component_color = '#3498db'  # Blue for system components
-data_source_color = '#27ae60'  # Green for data sources
-stakeholder_color = '#e74c3c'  # Red for stakeholders
-flow_color = '#7f8c8d'  # Gray for data flows
-
-# Create the main system boundary with padding
-system_boundary = patches.FancyBboxPatch(
-    (0.1, 0.2), 0.8, 0.6, 
-    boxstyle="round,pad=0.05",
-    fill=False, 
-    linewidth=3,
-    edgecolor=system_color,
-    linestyle='--'
-)
-plt.gca().add_patch(system_boundary)
-
-# Add system title
-plt.text(0.5, 0.83, 'GEFCom2012 Wind Forecasting System', 
-         ha='center', va='center', fontweight='bold', fontsize=16, color=system_color)
-
-# Core system components (inside boundary) - arranged in logical flow
-components = [
-    ("Data Ingestion &\nValidation", 0.25, 0.65, component_color),
-    ("Feature Store", 0.5, 0.65, component_color),
-    ("Model Training", 0.25, 0.45, component_color),
-    ("Model Registry", 0.5, 0.45, component_color),
-    ("API Serving", 0.25, 0.25, component_color),
-    ("Monitoring &\nFeedback", 0.5, 0.25, component_color)
-]
-
-for name, x, y, color in components:
-    # Component box
-    box = patches.FancyBboxPatch(
-        (x-0.1, y-0.08), 0.2, 0.16,
-        boxstyle="round,pad=0.02",
-        facecolor='white',
-        edgecolor=color,
-        linewidth=2,
-        alpha=0.9
-    )
-    plt.gca().add_patch(box)
-    
-    # Component text
-    plt.text(x, y, name, ha='center', va='center', fontweight='bold', fontsize=12, color=color)
-
-# External entities (outside boundary) - positioned logically
-external_entities = [
-    ("Meteorological\nData Sources", 0.25, 0.85, data_source_color),
-    ("Wind Farms\n(7 sites)", 0.5, 0.85, data_source_color),
-    ("Power\nMeasurements", 0.75, 0.85, data_source_color),
-    ("Grid Operators", 0.25, 0.1, stakeholder_color),
-    ("Energy Traders", 0.5, 0.1, stakeholder_color),
-    ("Wind Farm\nOperators", 0.75, 0.1, stakeholder_color)
-]
-
-for name, x, y, color in external_entities:
-    # Entity box
-    box = patches.FancyBboxPatch(
-        (x-0.12, y-0.09), 0.24, 0.18,
-        boxstyle="round,pad=0.02",
-        facecolor='white',
-        edgecolor=color,
-        linewidth=2,
-        alpha=0.9,
-        linestyle=':'
+DPI = 300
+
+
+# SYSTEM CONTEXT
+def system_context(path='system_context_diagram.png', dpi=DPI):
+    # Create figure with ample space
+    plt.figure(figsize=(14, 10))
+
+    # Define colors with better contrast
+    system_color = '#2c3e50'  # Dark blue-gray for system boundary
+    component_color = '#3498db'  # Blue for system components
+    data_source_color = '#27ae60'  # Green for data sources
+    stakeholder_color = '#e74c3c'  # Red for stakeholders
+    flow_color = '#7f8c8d'  # Gray for data flows
+
+    # Create the main system boundary with padding
+    system_boundary = patches.FancyBboxPatch(
+        (0.1, 0.2), 0.8, 0.6, 
+        boxstyle="round,pad=0.05",
+        fill=False, 
+        linewidth=3,
+        edgecolor=system_color,
+        linestyle='--'
     )
-    plt.gca().add_patch(box)
-    
-    # Entity text
-    plt.text(x, y, name, ha='center', va='center', fontweight='bold', fontsize=12, color=color)
-
-# Data flows - simplified and logical
-flows = [
-    # Data inputs
-    (0.25, 0.82, 0.25, 0.74, 'Weather forecasts', 'in'),
-    (0.5, 0.82, 0.5, 0.74, 'Historical power data', 'in'),
-    (0.75, 0.82, 0.71, 0.74, 'Real-time measurements', 'in'),
-    
-    # Internal flows
-    (0.36, 0.65, 0.43, 0.65, 'Processed features', 'internal'),
-    (0.36, 0.45, 0.43, 0.45, 'Trained models', 'internal'),
-    (0.25, 0.56, 0.25, 0.52, 'Feature requests', 'internal'),
-    (0.5, 0.56, 0.5, 0.52, 'Model requests', 'internal'),
-    (0.25, 0.36, 0.25, 0.32, 'Model predictions', 'internal'),
-    (0.5, 0.36, 0.5, 0.32, 'Performance metrics', 'internal'),
-    (0.36, 0.25, 0.43, 0.25, 'Monitoring data', 'internal'),
-    
-    # Output flows
-    (0.25, 0.18, 0.25, 0.18, 'Operational forecasts', 'out'),
-    (0.5, 0.18, 0.5, 0.18, 'Trading forecasts', 'out'),
-    (0.75, 0.71, 0.75, 0.18, 'Management reports', 'out'),
-    
-    # Feedback loops
-    (0.6, 0.25, 0.6, 0.35, 'Retraining triggers', 'feedback'),
-    (0.5, 0.18, 0.7, 0.75, 'Data quality alerts', 'feedback')
-]
-
-for x1, y1, x2, y2, label, flow_type in flows:
-    if flow_type == 'in':
-        color = data_source_color
-        style = '-'
-        width = 2
-    elif flow_type == 'out':
-        color = stakeholder_color
-        style = '-'
-        width = 2
-    elif flow_type == 'internal':
-        color = component_color
-        style = '-'
-        width = 1.5
-    elif flow_type == 'feedback':
-        color = '#9b59b6'  # Purple for feedback
-        style = '--'
-        width = 2
-    
-    # Draw arrow
-    plt.annotate('', xy=(x2, y2), xytext=(x1, y1),
-                arrowprops=dict(facecolor=color, width=width, headwidth=10, linestyle=style, alpha=0.8))
-    
-    # Add label with background for readability
-    mid_x = (x1 + x2) / 2
-    mid_y = (y1 + y2) / 2
-    label_x = mid_x
-    label_y = mid_y + 0.03
-    
-    if "alerts" in label:
-        label_x = 0.65
-        label_y = 0.45
-    elif "triggers" in label:
-        label_x = 0.65
-        label_y = 0.30
-    
-    plt.text(label_x, label_y, label, ha='center', va='center', 
-             bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.3'),
-             fontsize=10, fontweight='bold' if flow_type == 'feedback' else 'normal',
-             color=color)
-
-# Add legend with clearer explanation
-legend_elements = [
-    patches.Patch(edgecolor=system_color, facecolor='none', linestyle='--', linewidth=2, label='System Boundary'),
-    patches.Patch(edgecolor=component_color, facecolor='white', linewidth=2, label='System Components'),
-    patches.Patch(edgecolor=data_source_color, facecolor='white', linestyle=':', linewidth=2, label='Data Sources'),
-    patches.Patch(edgecolor=stakeholder_color, facecolor='white', linestyle=':', linewidth=2, label='Stakeholders'),
-    patches.Patch(edgecolor='#9b59b6', facecolor='none', linestyle='--', linewidth=2, label='Feedback Loops')
-]
-
-plt.legend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, 0.05), 
-          ncol=5, frameon=True, fontsize=12, title="Legend", title_fontsize=13)
-
-# Final layout adjustments
-plt.title('System Context Diagram: GEFCom2012 Wind Forecasting System', fontsize=18, fontweight='bold', pad=20)
-plt.xlim(0, 1)
-plt.ylim(0, 1)
-plt.axis('off')
-plt.tight_layout(rect=[0, 0.05, 1, 0.95])  # Make room for legend and title
-plt.savefig('system_context_diagram.png', dpi=300, bbox_inches='tight')
-plt.close()
+    plt.gca().add_patch(system_boundary)
+
+    # Add system title
+    plt.text(0.5, 0.83, 'GEFCom2012 Wind Forecasting System', 
+             ha='center', va='center', fontweight='bold', fontsize=16, color=system_color)
+
+    # Core system components (inside boundary) - arranged in logical flow
+    components = [
+        ("Data Ingestion &\nValidation", 0.25, 0.65, component_color),
+        ("Feature Store", 0.5, 0.65, component_color),
+        ("Model Training", 0.25, 0.45, component_color),
+        ("Model Registry", 0.5, 0.45, component_color),
+        ("API Serving", 0.25, 0.25, component_color),
+        ("Monitoring &\nFeedback", 0.5, 0.25, component_color)
+    ]
+
+    for name, x, y, color in components:
+        # Component box
+        box = patches.FancyBboxPatch(
+            (x-0.1, y-0.08), 0.2, 0.16,
+            boxstyle="round,pad=0.02",
+            facecolor='white',
+            edgecolor=color,
+            linewidth=2,
+            alpha=0.9
+        )
+        plt.gca().add_patch(box)
+
+        # Component text
+        plt.text(x, y, name, ha='center', va='center', fontweight='bold', fontsize=12, color=color)
+
+    # External entities (outside boundary) - positioned logically
+    external_entities = [
+        ("Meteorological\nData Sources", 0.25, 0.85, data_source_color),
+        ("Wind Farms\n(7 sites)", 0.5, 0.85, data_source_color),
+        ("Power\nMeasurements", 0.75, 0.85, data_source_color),
+        ("Grid Operators", 0.25, 0.1, stakeholder_color),
+        ("Energy Traders", 0.5, 0.1, stakeholder_color),
+        ("Wind Farm\nOperators", 0.75, 0.1, stakeholder_color)
+    ]
+
+    for name, x, y, color in external_entities:
+        # Entity box
+        box = patches.FancyBboxPatch(
+            (x-0.12, y-0.09), 0.24, 0.18,
+            boxstyle="round,pad=0.02",
+            facecolor='white',
+            edgecolor=color,
+            linewidth=2,
+            alpha=0.9,
+            linestyle=':'
+        )
+        plt.gca().add_patch(box)
+
+        # Entity text
+        plt.text(x, y, name, ha='center', va='center', fontweight='bold', fontsize=12, color=color)
+
+    # Data flows - simplified and logical
+    flows = [
+        # Data inputs
+        (0.25, 0.82, 0.25, 0.74, 'Weather forecasts', 'in'),
+        (0.5, 0.82, 0.5, 0.74, 'Historical power data', 'in'),
+        (0.75, 0.82, 0.71, 0.74, 'Real-time measurements', 'in'),
+
+        # Internal flows
+        (0.36, 0.65, 0.43, 0.65, 'Processed features', 'internal'),
+        (0.36, 0.45, 0.43, 0.45, 'Trained models', 'internal'),
+        (0.25, 0.56, 0.25, 0.52, 'Feature requests', 'internal'),
+        (0.5, 0.56, 0.5, 0.52, 'Model requests', 'internal'),
+        (0.25, 0.36, 0.25, 0.32, 'Model predictions', 'internal'),
+        (0.5, 0.36, 0.5, 0.32, 'Performance metrics', 'internal'),
+        (0.36, 0.25, 0.43, 0.25, 'Monitoring data', 'internal'),
+
+        # Output flows
+        (0.25, 0.18, 0.25, 0.18, 'Operational forecasts', 'out'),
+        (0.5, 0.18, 0.5, 0.18, 'Trading forecasts', 'out'),
+        (0.75, 0.71, 0.75, 0.18, 'Management reports', 'out'),
+
+        # Feedback loops
+        (0.6, 0.25, 0.6, 0.35, 'Retraining triggers', 'feedback'),
+        (0.5, 0.18, 0.7, 0.75, 'Data quality alerts', 'feedback')
+    ]
+
+    for x1, y1, x2, y2, label, flow_type in flows:
+        if flow_type == 'in':
+            color = data_source_color
+            style = '-'
+            width = 2
+        elif flow_type == 'out':
+            color = stakeholder_color
+            style = '-'
+            width = 2
+        elif flow_type == 'internal':
+            color = component_color
+            style = '-'
+            width = 1.5
+        elif flow_type == 'feedback':
+            color = '#9b59b6'  # Purple for feedback
+            style = '--'
+            width = 2
+
+        # Draw arrow
+        plt.annotate('', xy=(x2, y2), xytext=(x1, y1),
+                    arrowprops=dict(facecolor=color, width=width, headwidth=10, linestyle=style, alpha=0.8))
+
+        # Add label with background for readability
+        mid_x = (x1 + x2) / 2
+        mid_y = (y1 + y2) / 2
+        label_x = mid_x
+        label_y = mid_y + 0.03
+
+        if "alerts" in label:
+            label_x = 0.65
+            label_y = 0.45
+        elif "triggers" in label:
+            label_x = 0.65
+            label_y = 0.30
+
+        plt.text(label_x, label_y, label, ha='center', va='center', 
+                 bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.3'),
+                 fontsize=10, fontweight='bold' if flow_type == 'feedback' else 'normal',
+                 color=color)
+
+    # Add legend with clearer explanation
+    legend_elements = [
+        patches.Patch(edgecolor=system_color, facecolor='none', linestyle='--', linewidth=2, label='System Boundary'),
+        patches.Patch(edgecolor=component_color, facecolor='white', linewidth=2, label='System Components'),
+        patches.Patch(edgecolor=data_source_color, facecolor='white', linestyle=':', linewidth=2, label='Data Sources'),
+        patches.Patch(edgecolor=stakeholder_color, facecolor='white', linestyle=':', linewidth=2, label='Stakeholders'),
+        patches.Patch(edgecolor='#9b59b6', facecolor='none', linestyle='--', linewidth=2, label='Feedback Loops')
+    ]
+
+    plt.legend(handles=legend_elements, loc='upper center', bbox_to_anchor=(0.5, 0.05), 
+              ncol=5, frameon=True, fontsize=12, title="Legend", title_fontsize=13)
+
+    # Final layout adjustments
+    plt.title('System Context Diagram: GEFCom2012 Wind Forecasting System', fontsize=18, fontweight='bold', pad=20)
+    plt.xlim(0, 1)
+    plt.ylim(0, 1)
+    plt.axis('off')
+    plt.tight_layout(rect=[0, 0.05, 1, 0.95])  # Make room for legend and title
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-# SYSTEM FAILURE PROPAGATION
 
-plt.figure(figsize=(10, 6))
-
-# Time steps
-time_steps = np.arange(0, 20)
-
-# Failure propagation under different noise levels (from CA simulation results)
-noise_0_01 = [0, 5, 7, 8, 8, 9, 9, 9, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]  # With fault isolation
-noise_0_02 = [0, 8, 12, 15, 18, 20, 23, 25, 28, 30, 32, 35, 37, 39, 40, 42, 43, 45, 45, 45]
-noise_0_05 = [0, 10, 18, 28, 40, 52, 65, 75, 82, 88, 92, 95, 97, 98, 99, 99, 99, 99, 99, 99]
-
-# Failure propagation with fault isolation
-noise_0_01_fi = [0, 5, 6, 7, 8, 9, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
-noise_0_02_fi = [0, 8, 10, 12, 15, 18, 20, 22, 23, 24, 25, 26, 27, 28, 28, 28, 28, 28, 28, 28]
-noise_0_05_fi = [0, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 85, 85, 85, 85]
-
-# Plot without fault isolation
-plt.plot(time_steps, noise_0_01, 'b-', linewidth=2.5, label='Low Noise (p=0.01), No Fault Isolation')
-plt.plot(time_steps, noise_0_02, 'g-', linewidth=2.5, label='Moderate Noise (p=0.02), No Fault Isolation')
-plt.plot(time_steps, noise_0_05, 'r-', linewidth=2.5, label='High Noise (p=0.05), No Fault Isolation')
-
-# Plot with fault isolation
-plt.plot(time_steps, noise_0_01_fi, 'b--', linewidth=2, label='Low Noise (p=0.01), With Fault Isolation')
-plt.plot(time_steps, noise_0_02_fi, 'g--', linewidth=2, label='Moderate Noise (p=0.02), With Fault Isolation')
-plt.plot(time_steps, noise_0_05_fi, 'r--', linewidth=2, label='High Noise (p=0.05), With Fault Isolation')
-
-# Add annotations for critical points
-plt.annotate('Systemic failure\nwithout isolation', xy=(15, 95), xytext=(16, 80),
-            arrowprops=dict(facecolor='red', shrink=0.05, width=1.5),
-            fontsize=10, fontweight='bold')
-
-plt.annotate('Stabilization\nwith isolation', xy=(15, 28), xytext=(16, 40),
-            arrowprops=dict(facecolor='green', shrink=0.05, width=1.5),
-            fontsize=10, fontweight='bold')
-
-# Add horizontal line for 80% threshold
-plt.axhline(y=80, color='gray', linestyle=':', linewidth=1.5)
-plt.text(1, 82, '80% Failure Threshold', fontsize=9, color='gray')
-
-plt.title('Failure Propagation Analysis: Impact of Fault Isolation', fontsize=14, fontweight='bold')
-plt.xlabel('Time Steps', fontsize=12)
-plt.ylabel('System Compromised (%)', fontsize=12)
-plt.grid(True, linestyle='--', alpha=0.7)
-plt.legend(loc='lower right', fontsize=9)
-plt.xlim(0, 19)
-plt.ylim(0, 100)
-plt.tight_layout()
-plt.savefig('failure_propagation.png', dpi=300, bbox_inches='tight')
-plt.close()
+# SYSTEM FAILURE PROPAGATION
+def failure_propagation(path='failure_propagation.png', dpi=DPI):
+    plt.figure(figsize=(10, 6))
+
+    # Time steps
+    time_steps = np.arange(0, 20)
+
+    # Failure propagation under different noise levels (from CA simulation results)
+    noise_0_01 = [0, 5, 7, 8, 8, 9, 9, 9, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]  # With fault isolation
+    noise_0_02 = [0, 8, 12, 15, 18, 20, 23, 25, 28, 30, 32, 35, 37, 39, 40, 42, 43, 45, 45, 45]
+    noise_0_05 = [0, 10, 18, 28, 40, 52, 65, 75, 82, 88, 92, 95, 97, 98, 99, 99, 99, 99, 99, 99]
+
+    # Failure propagation with fault isolation
+    noise_0_01_fi = [0, 5, 6, 7, 8, 9, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
+    noise_0_02_fi = [0, 8, 10, 12, 15, 18, 20, 22, 23, 24, 25, 26, 27, 28, 28, 28, 28, 28, 28, 28]
+    noise_0_05_fi = [0, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80, 85, 85, 85, 85]
+
+    # Plot without fault isolation
+    plt.plot(time_steps, noise_0_01, 'b-', linewidth=2.5, label='Low Noise (p=0.01), No Fault Isolation')
+    plt.plot(time_steps, noise_0_02, 'g-', linewidth=2.5, label='Moderate Noise (p=0.02), No Fault Isolation')
+    plt.plot(time_steps, noise_0_05, 'r-', linewidth=2.5, label='High Noise (p=0.05), No Fault Isolation')
+
+    # Plot with fault isolation
+    plt.plot(time_steps, noise_0_01_fi, 'b--', linewidth=2, label='Low Noise (p=0.01), With Fault Isolation')
+    plt.plot(time_steps, noise_0_02_fi, 'g--', linewidth=2, label='Moderate Noise (p=0.02), With Fault Isolation')
+    plt.plot(time_steps, noise_0_05_fi, 'r--', linewidth=2, label='High Noise (p=0.05), With Fault Isolation')
+
+    # Add annotations for critical points
+    plt.annotate('Systemic failure\nwithout isolation', xy=(15, 95), xytext=(16, 80),
+                arrowprops=dict(facecolor='red', shrink=0.05, width=1.5),
+                fontsize=10, fontweight='bold')
+
+    plt.annotate('Stabilization\nwith isolation', xy=(15, 28), xytext=(16, 40),
+                arrowprops=dict(facecolor='green', shrink=0.05, width=1.5),
+                fontsize=10, fontweight='bold')
+
+    # Add horizontal line for 80% threshold
+    plt.axhline(y=80, color='gray', linestyle=':', linewidth=1.5)
+    plt.text(1, 82, '80% Failure Threshold', fontsize=9, color='gray')
+
+    plt.title('Failure Propagation Analysis: Impact of Fault Isolation', fontsize=14, fontweight='bold')
+    plt.xlabel('Time Steps', fontsize=12)
+    plt.ylabel('System Compromised (%)', fontsize=12)
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='lower right', fontsize=9)
+    plt.xlim(0, 19)
+    plt.ylim(0, 100)
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-import matplotlib.pyplot as plt
-import numpy as np
 
 # BIFURCATION DIAGRAM
+def bifurcation(sweep, path='bifurcation_diagram.png'):
+    # Measured RMSE vs. max_depth / n_estimators / seed (successive-halving
+    # sweep on farm 1, results cached under models/sweep, see ml_sweep.py)
+    from ml_sweep import plot_sensitivity
+
+    return plot_sensitivity(sweep, path=path)
+
+
+# RECOVERY TIMES
+def recovery_times(table, path='recovery_times.png', dpi=DPI):
+    """`table`: ca_recovery.recovery_table() rows for domains 1 and 4."""
+    from ca_recovery import recovery_summary
+
+    plt.figure(figsize=(10, 6))
+
+    # Measured recovery times (median over replicas, see ca_recovery.py)
+    recovery = recovery_summary(table)
+    noise_levels = recovery.index.tolist()
+    without_isolation = recovery[1].tolist()  # inf: never recovers
+    with_isolation = recovery[4].tolist()
+
+    x = np.arange(len(noise_levels))
+    width = 0.35
+
+    finite = [v for v in without_isolation + with_isolation if v < float('inf')]
+    top = 1.3 * max(finite, default=20)
+
+    # Create bars (inf, never recovered, is drawn full height)
+    def shown(values):
+        return [v if v < float('inf') else top for v in values]
+
+    bars1 = plt.bar(x - width/2, shown(without_isolation), width, label='Without Fault Isolation', color='salmon')
+    bars2 = plt.bar(x + width/2, shown(with_isolation), width, label='With Fault Isolation', color='lightgreen')
+
+    # Add value labels on bars
+    for bar, value in zip(list(bars1) + list(bars2), without_isolation + with_isolation):
+        if value < float('inf'):
+            plt.annotate(f'{value:g}',
+                        xy=(bar.get_x() + bar.get_width() / 2, value),
+                        xytext=(0, 3),  # 3 points vertical offset
+                        textcoords="offset points",
+                        ha='center', va='bottom', fontweight='bold')
+        else:
+            bar.set_hatch('//')
+            plt.annotate('∞',
+                        xy=(bar.get_x() + bar.get_width() / 2, 0.8 * top),
+                        xytext=(0, 3),
+                        textcoords="offset points",
+                        ha='center', va='bottom', fontweight='bold', color='red', fontsize=16,
+                        bbox=dict(boxstyle='round', fc='white', ec='none'))
+
+    # Add title and labels
+    plt.title('System Recovery Times Under Different Noise Levels', fontsize=14, fontweight='bold', pad=30)
+    plt.xlabel('Noise Level (p_noise)', fontsize=12)
+    plt.ylabel('Recovery Time (Steps)', fontsize=12)
+    plt.xticks(x, noise_levels)
+    plt.ylim(0, top)
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+
+    # Add note about infinite recovery time
+    plt.figtext(0.5, 0.01, 'Note: ∞ indicates the system never returns to its pre-failure density', 
+               ha='center', fontsize=9, style='italic')
+
+    plt.legend(loc='lower center', bbox_to_anchor=(0.5, 1.0), ncol=2, frameon=False)
+    plt.tight_layout(rect=[0, 0.03, 1, 1])  # Adjust layout to make room for the note
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
 
-plt.figure(figsize=(10, 6))
-
-# Max depth parameter values
-max_depths = np.linspace(1, 15, 140)
-
-# RMSE values with bifurcation characteristics
-# Create a function that has stable regions and chaotic transitions
-def rmse_function(depth):
-    if depth < 5:
-        # Stable region with gradual improvement
-        return 0.20 - 0.015 * depth + np.random.normal(0, 0.002)
-    elif depth < 9:
-        # Chaotic region with fluctuations
-        return 0.12 + 0.02 * np.sin(1.5 * depth) + 0.015 * np.sin(3.7 * depth) + np.random.normal(0, 0.003)
-    else:
-        # Second stable region approaching minimum
-        return 0.10 + 0.01 * np.exp(-(depth-9)/3) + np.random.normal(0, 0.0015)
-
-# Generate RMSE values
-rmse_values = [rmse_function(d) for d in max_depths]
-
-# Plot the bifurcation diagram
-plt.plot(max_depths, rmse_values, 'b.', markersize=8, alpha=0.7)
-
-# Highlight critical transition points
-plt.axvline(x=5, color='r', linestyle='--', linewidth=1.5, label='Critical Transition 1 (depth=5)')
-plt.axvline(x=9, color='g', linestyle='--', linewidth=1.5, label='Critical Transition 2 (depth=9)')
-
-# Add annotations for regions
-plt.annotate('Stable Region\n(Gradual Improvement)', xy=(3, 0.16), xytext=(2, 0.17),
-            arrowprops=dict(facecolor='blue', shrink=0.05, width=1.5),
-            fontsize=10, fontweight='bold')
-
-plt.annotate('Chaotic Region\n(Performance Fluctuations)', xy=(7, 0.14), xytext=(6, 0.16),
-            arrowprops=dict(facecolor='red', shrink=0.05, width=1.5),
-            fontsize=10, fontweight='bold')
-
-plt.annotate('Converged Region\n(Optimal Performance)', xy=(12, 0.105), xytext=(11, 0.12),
-            arrowprops=dict(facecolor='green', shrink=0.05, width=1.5),
-            fontsize=10, fontweight='bold')
-
-# Add baseline and minimum performance lines
-plt.axhline(y=0.172, color='gray', linestyle=':', linewidth=1.5, label='Baseline RMSE (70 trees)')
-plt.axhline(y=0.10, color='purple', linestyle=':', linewidth=1.5, label='Theoretical Minimum')
-
-plt.title('Bifurcation Diagram: RMSE vs. Max Depth Parameter', fontsize=14, fontweight='bold')
-plt.xlabel('Max Depth Parameter', fontsize=12)
-plt.ylabel('RMSE', fontsize=12)
-plt.grid(True, linestyle='--', alpha=0.7)
-plt.legend(loc='upper right', fontsize=9)
-plt.xlim(1, 15)
-plt.ylim(0.09, 0.21)
-plt.tight_layout()
-plt.savefig('bifurcation_diagram.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-
-# RECCOVERY TIMES 
-plt.figure(figsize=(10, 6))
-
-# Data from the recovery times table
-noise_levels = [0.01, 0.02, 0.05]
-without_isolation = [8, 15, float('inf')]  # Never recovers for high noise
-with_isolation = [2, 3, 8]
-
-x = np.arange(len(noise_levels))
-width = 0.35
-
-# Create bars
-bars1 = plt.bar(x - width/2, without_isolation, width, label='Without Fault Isolation', color='salmon')
-bars2 = plt.bar(x + width/2, with_isolation, width, label='With Fault Isolation', color='lightgreen')
-
-# Add value labels on bars
-for bar in bars1:
-    height = bar.get_height()
-    if height < float('inf'):
-        plt.annotate(f'{height}',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),  # 3 points vertical offset
-                    textcoords="offset points",
-                    ha='center', va='bottom', fontweight='bold')
-    else:
-        plt.annotate('∞',
-                    xy=(bar.get_x() + bar.get_width() / 2, 20),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha='center', va='bottom', fontweight='bold', color='red')
-
-for bar in bars2:
-    height = bar.get_height()
-    plt.annotate(f'{height}',
-                xy=(bar.get_x() + bar.get_width() / 2, height),
-                xytext=(0, 3),
-                textcoords="offset points",
-                ha='center', va='bottom', fontweight='bold')
-
-# Add title and labels
-plt.title('System Recovery Times Under Different Noise Levels', fontsize=14, fontweight='bold')
-plt.xlabel('Noise Level (p_noise)', fontsize=12)
-plt.ylabel('Recovery Time (Steps)', fontsize=12)
-plt.xticks(x, noise_levels)
-plt.ylim(0, 25)
-plt.grid(axis='y', linestyle='--', alpha=0.7)
-
-# Add note about infinite recovery time
-plt.figtext(0.5, 0.01, 'Note: ∞ indicates system never recovers to stable state', 
-           ha='center', fontsize=9, style='italic')
-
-plt.legend()
-plt.tight_layout(rect=[0, 0.03, 1, 1])  # Adjust layout to make room for the note
-plt.savefig('recovery_times.png', dpi=300, bbox_inches='tight')
-plt.close()
 
 # SYSTEM ARCHITECTURE
-
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.font_manager import FontProperties
-import numpy as np
-import matplotlib.lines as mlines
-
-plt.figure(figsize=(14, 12))
-
-# Define professional color scheme with good contrast
-data_color = '#1f77b4'      # Blue for data components
-model_color = '#9467bd'     # Purple for model components
-ops_color = '#2ca02c'       # Green for operations components
-monitor_color = '#ff7f0e'   # Orange for monitoring components
-feedback_color = '#d62728'  # Red for feedback paths
-
-# Set professional font
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans']
-
-# Create fault domain backgrounds first
-fault_domains = [
-    (0.05, 0.72, 0.9, 0.23, data_color, "Fault Domain 1: Data Management"),
-    (0.05, 0.47, 0.9, 0.20, model_color, "Fault Domain 2: Model Lifecycle"),
-    (0.05, 0.22, 0.9, 0.20, ops_color, "Fault Domain 3: Operations & Monitoring")
-]
-
-for x, y, width, height, color, label in fault_domains:
-    # Draw semi-transparent background
-    rect = patches.Rectangle((x, y), width, height, 
-                            facecolor=color, alpha=0.08, 
-                            edgecolor=color, linestyle='--', linewidth=1.5)
-    plt.gca().add_patch(rect)
-    
-    # Add label on the left side
-    plt.text(x-0.01, y + height/2, label, 
-            ha='right', va='center', fontweight='bold', fontsize=11, color=color,
-            rotation=90, bbox=dict(facecolor='white', alpha=0.85, edgecolor='none'))
-
-# Define all components with positions and colors
-components = [
-    # Data Management Domain
-    ("1. Raw Sources\n(Input Layer)", 0.5, 0.90, data_color),
-    ("2. Ingestion & Validation", 0.5, 0.82, data_color),
-    ("3. Raw Data Lake /\nTime-series Store", 0.5, 0.74, data_color),
-    ("4. Processing & Alignment\n(ETL)", 0.5, 0.66, data_color),
-    ("5. Feature Store\n(versioned)", 0.5, 0.58, data_color),
-    
-    # Model Lifecycle Domain
-    ("6. Model Training /\nExperimentation", 0.5, 0.50, model_color),
-    ("7. Model Registry &\nCanary Deployment", 0.5, 0.42, model_color),
-    
-    # Operations & Monitoring Domain
-    ("8. Serving / API Layer", 0.5, 0.34, ops_color),
-    ("9. Monitoring, Alerting &\nRetraining Control", 0.5, 0.26, monitor_color),
-    ("10. Dashboard & Audit", 0.33, 0.18, monitor_color),
-    ("11. Operations & Backup", 0.67, 0.18, ops_color)
-]
-
-# Draw components
-for name, x, y, color in components:
-    # Component box with professional styling
-    box = patches.FancyBboxPatch(
-        (x-0.28, y-0.045), 0.56, 0.09,
-        boxstyle="round,pad=0.02",
-        facecolor='white',
-        edgecolor=color,
-        linewidth=2,
-        alpha=0.95,
-        linestyle='-',
-        zorder=3
-    )
-    plt.gca().add_patch(box)
-    
-    # Component text
-    plt.text(x, y, name, 
-            ha='center', va='center', 
-            fontweight='bold', fontsize=11, color=color)
-
-# Draw primary data flow (vertical line)
-plt.plot([0.5, 0.5], [0.95, 0.38], color='#2c3e50', linewidth=2.5, alpha=0.8, zorder=2)
-plt.plot([0.5, 0.5], [0.30, 0.22], color='#2c3e50', linewidth=2.5, alpha=0.8, zorder=2)
-
-# Draw connections to side components
-plt.plot([0.5, 0.33], [0.22, 0.18], color=monitor_color, linewidth=2, alpha=0.8)
-plt.plot([0.5, 0.67], [0.22, 0.18], color=ops_color, linewidth=2, alpha=0.8)
-
-# Add arrows on the main flow
-arrow_positions = [0.86, 0.78, 0.70, 0.62, 0.54, 0.46, 0.38, 0.26]
-for pos in arrow_positions:
-    plt.scatter([0.5], [pos], color='#2c3e50', s=80, zorder=4, marker='v')
-
-# Draw feedback loops
-# 1. Retraining feedback loop (from monitoring to model training)
-plt.plot([0.65, 0.85, 0.85, 0.65], [0.26, 0.26, 0.50, 0.50], 
-         color=feedback_color, linewidth=2.5, alpha=0.9, linestyle='-')
-plt.scatter([0.65], [0.50], color=feedback_color, s=80, zorder=4, marker='^')
-
-# 2. Data quality feedback loop (from monitoring to ingestion)
-plt.plot([0.35, 0.15, 0.15, 0.35], [0.26, 0.26, 0.82, 0.82], 
-         color=feedback_color, linewidth=2.5, alpha=0.9, linestyle='-')
-plt.scatter([0.35], [0.82], color=feedback_color, s=80, zorder=4, marker='^')
-
-# Add feedback loop labels
-plt.text(0.85, 0.38, "Automatic\nRetraining", 
-         ha='center', va='center', fontweight='bold', fontsize=11, color=feedback_color,
-         bbox=dict(facecolor='white', alpha=0.9, edgecolor=feedback_color, boxstyle='round,pad=0.5'))
-
-plt.text(0.15, 0.54, "Data Quality\nAlerts", 
-         ha='center', va='center', fontweight='bold', fontsize=11, color=feedback_color,
-         bbox=dict(facecolor='white', alpha=0.9, edgecolor=feedback_color, boxstyle='round,pad=0.5'))
-
-# Add data flow label
-plt.text(0.55, 0.60, "Primary Data Flow", 
-         ha='left', va='center', fontweight='bold', fontsize=11, color='#2c3e50',
-         rotation=90)
-
-# Add key annotations for critical aspects
-annotations = [
-    ("Immutable raw data\nwith versioning", 0.85, 0.90, data_color),
-    ("Schema validation &\ntime integrity checks", 0.85, 0.82, data_color),
-    ("Time-series optimized\nstorage", 0.85, 0.74, data_color),
-    ("Feature versioning\nprevents drift", 0.85, 0.58, data_color),
-    ("Rolling-origin\nvalidation", 0.85, 0.50, model_color),
-    ("A/B testing before\nfull deployment", 0.85, 0.42, model_color),
-    ("99% uptime SLA\nwith fallback", 0.85, 0.34, ops_color),
-    ("RMSE monitoring\nper farm/horizon", 0.85, 0.26, monitor_color),
-    ("Multi-region\nbackup strategy", 0.85, 0.18, ops_color)
-]
-
-for text, x, y, color in annotations:
-    plt.text(x, y, text, 
-            ha='left', va='center', 
-            bbox=dict(facecolor='white', alpha=0.9, edgecolor=color, boxstyle='round,pad=0.3'),
-            fontsize=9, fontweight='normal', color=color)
-
-# Add title and description
-plt.title('GEFCom2012 Wind Forecasting System Architecture\nRefined Design with Fault Domains and Feedback Control', 
-          fontsize=16, fontweight='bold', pad=20)
-plt.figtext(0.5, 0.96, 'This architecture implements fault isolation boundaries and automated feedback loops\n'
-                      'to maintain 99% uptime despite the chaotic nature of wind forecasting systems',
-           ha='center', fontsize=12, style='italic')
-
-# Add legend
-legend_elements = [
-    mlines.Line2D([], [], color=feedback_color, linewidth=2.5, linestyle='-', 
-                 label='Feedback Control Loops'),
-    mlines.Line2D([], [], color='#2c3e50', linewidth=2.5, marker='v', markersize=8,
-                 label='Primary Data Flow Direction'),
-    patches.Patch(edgecolor=data_color, facecolor='none', linestyle='--', linewidth=1.5, 
-                 label='Fault Domain Boundary')
-]
-
-plt.legend(handles=legend_elements, loc='lower center', bbox_to_anchor=(0.5, 0.01),
-          ncol=3, frameon=True, fontsize=10, title="Flow Conventions", title_fontsize=11)
-
-# Final layout adjustments
-plt.xlim(0, 1)
-plt.ylim(0, 1)
-plt.axis('off')
-plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-plt.savefig('system_architecture.png', dpi=300, bbox_inches='tight')
-plt.close()
\ No newline at end of file
+def system_architecture(path='system_architecture.png', dpi=DPI):
+    plt.figure(figsize=(14, 12))
+
+    # Define professional color scheme with good contrast
+    data_color = '#1f77b4'      # Blue for data components
+    model_color = '#9467bd'     # Purple for model components
+    ops_color = '#2ca02c'       # Green for operations components
+    monitor_color = '#ff7f0e'   # Orange for monitoring components
+    feedback_color = '#d62728'  # Red for feedback paths
+
+    # Set professional font
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans']
+
+    # Create fault domain backgrounds first
+    fault_domains = [
+        (0.05, 0.72, 0.9, 0.23, data_color, "Fault Domain 1: Data Management"),
+        (0.05, 0.47, 0.9, 0.20, model_color, "Fault Domain 2: Model Lifecycle"),
+        (0.05, 0.22, 0.9, 0.20, ops_color, "Fault Domain 3: Operations & Monitoring")
+    ]
+
+    for x, y, width, height, color, label in fault_domains:
+        # Draw semi-transparent background
+        rect = patches.Rectangle((x, y), width, height, 
+                                facecolor=color, alpha=0.08, 
+                                edgecolor=color, linestyle='--', linewidth=1.5)
+        plt.gca().add_patch(rect)
+
+        # Add label on the left side
+        plt.text(x-0.01, y + height/2, label, 
+                ha='right', va='center', fontweight='bold', fontsize=11, color=color,
+                rotation=90, bbox=dict(facecolor='white', alpha=0.85, edgecolor='none'))
+
+    # Define all components with positions and colors
+    components = [
+        # Data Management Domain
+        ("1. Raw Sources\n(Input Layer)", 0.5, 0.90, data_color),
+        ("2. Ingestion & Validation", 0.5, 0.82, data_color),
+        ("3. Raw Data Lake /\nTime-series Store", 0.5, 0.74, data_color),
+        ("4. Processing & Alignment\n(ETL)", 0.5, 0.66, data_color),
+        ("5. Feature Store\n(versioned)", 0.5, 0.58, data_color),
+
+        # Model Lifecycle Domain
+        ("6. Model Training /\nExperimentation", 0.5, 0.50, model_color),
+        ("7. Model Registry &\nCanary Deployment", 0.5, 0.42, model_color),
+
+        # Operations & Monitoring Domain
+        ("8. Serving / API Layer", 0.5, 0.34, ops_color),
+        ("9. Monitoring, Alerting &\nRetraining Control", 0.5, 0.26, monitor_color),
+        ("10. Dashboard & Audit", 0.33, 0.18, monitor_color),
+        ("11. Operations & Backup", 0.67, 0.18, ops_color)
+    ]
+
+    # Draw components
+    for name, x, y, color in components:
+        # Component box with professional styling
+        box = patches.FancyBboxPatch(
+            (x-0.28, y-0.045), 0.56, 0.09,
+            boxstyle="round,pad=0.02",
+            facecolor='white',
+            edgecolor=color,
+            linewidth=2,
+            alpha=0.95,
+            linestyle='-',
+            zorder=3
+        )
+        plt.gca().add_patch(box)
+
+        # Component text
+        plt.text(x, y, name, 
+                ha='center', va='center', 
+                fontweight='bold', fontsize=11, color=color)
+
+    # Draw primary data flow (vertical line)
+    plt.plot([0.5, 0.5], [0.95, 0.38], color='#2c3e50', linewidth=2.5, alpha=0.8, zorder=2)
+    plt.plot([0.5, 0.5], [0.30, 0.22], color='#2c3e50', linewidth=2.5, alpha=0.8, zorder=2)
+
+    # Draw connections to side components
+    plt.plot([0.5, 0.33], [0.22, 0.18], color=monitor_color, linewidth=2, alpha=0.8)
+    plt.plot([0.5, 0.67], [0.22, 0.18], color=ops_color, linewidth=2, alpha=0.8)
+
+    # Add arrows on the main flow
+    arrow_positions = [0.86, 0.78, 0.70, 0.62, 0.54, 0.46, 0.38, 0.26]
+    for pos in arrow_positions:
+        plt.scatter([0.5], [pos], color='#2c3e50', s=80, zorder=4, marker='v')
+
+    # Draw feedback loops
+    # 1. Retraining feedback loop (from monitoring to model training)
+    plt.plot([0.65, 0.85, 0.85, 0.65], [0.26, 0.26, 0.50, 0.50], 
+             color=feedback_color, linewidth=2.5, alpha=0.9, linestyle='-')
+    plt.scatter([0.65], [0.50], color=feedback_color, s=80, zorder=4, marker='^')
+
+    # 2. Data quality feedback loop (from monitoring to ingestion)
+    plt.plot([0.35, 0.15, 0.15, 0.35], [0.26, 0.26, 0.82, 0.82], 
+             color=feedback_color, linewidth=2.5, alpha=0.9, linestyle='-')
+    plt.scatter([0.35], [0.82], color=feedback_color, s=80, zorder=4, marker='^')
+
+    # Add feedback loop labels
+    plt.text(0.85, 0.38, "Automatic\nRetraining", 
+             ha='center', va='center', fontweight='bold', fontsize=11, color=feedback_color,
+             bbox=dict(facecolor='white', alpha=0.9, edgecolor=feedback_color, boxstyle='round,pad=0.5'))
+
+    plt.text(0.15, 0.54, "Data Quality\nAlerts", 
+             ha='center', va='center', fontweight='bold', fontsize=11, color=feedback_color,
+             bbox=dict(facecolor='white', alpha=0.9, edgecolor=feedback_color, boxstyle='round,pad=0.5'))
+
+    # Add data flow label
+    plt.text(0.55, 0.60, "Primary Data Flow", 
+             ha='left', va='center', fontweight='bold', fontsize=11, color='#2c3e50',
+             rotation=90)
+
+    # Add key annotations for critical aspects
+    annotations = [
+        ("Immutable raw data\nwith versioning", 0.85, 0.90, data_color),
+        ("Schema validation &\ntime integrity checks", 0.85, 0.82, data_color),
+        ("Time-series optimized\nstorage", 0.85, 0.74, data_color),
+        ("Feature versioning\nprevents drift", 0.85, 0.58, data_color),
+        ("Rolling-origin\nvalidation", 0.85, 0.50, model_color),
+        ("A/B testing before\nfull deployment", 0.85, 0.42, model_color),
+        ("99% uptime SLA\nwith fallback", 0.85, 0.34, ops_color),
+        ("RMSE monitoring\nper farm/horizon", 0.85, 0.26, monitor_color),
+        ("Multi-region\nbackup strategy", 0.85, 0.18, ops_color)
+    ]
+
+    for text, x, y, color in annotations:
+        plt.text(x, y, text, 
+                ha='left', va='center', 
+                bbox=dict(facecolor='white', alpha=0.9, edgecolor=color, boxstyle='round,pad=0.3'),
+                fontsize=9, fontweight='normal', color=color)
+
+    # Add title and description
+    plt.title('GEFCom2012 Wind Forecasting System Architecture\nRefined Design with Fault Domains and Feedback Control', 
+              fontsize=16, fontweight='bold', pad=20)
+    plt.figtext(0.5, 0.96, 'This architecture implements fault isolation boundaries and automated feedback loops\n'
+                          'to maintain 99% uptime despite the chaotic nature of wind forecasting systems',
+               ha='center', fontsize=12, style='italic')
+
+    # Add legend
+    legend_elements = [
+        mlines.Line2D([], [], color=feedback_color, linewidth=2.5, linestyle='-', 
+                     label='Feedback Control Loops'),
+        mlines.Line2D([], [], color='#2c3e50', linewidth=2.5, marker='v', markersize=8,
+                     label='Primary Data Flow Direction'),
+        patches.Patch(edgecolor=data_color, facecolor='none', linestyle='--', linewidth=1.5, 
+                     label='Fault Domain Boundary')
+    ]
+
+    plt.legend(handles=legend_elements, loc='lower center', bbox_to_anchor=(0.5, 0.01),
+              ncol=3, frameon=True, fontsize=10, title="Flow Conventions", title_fontsize=11)
+
+    # Final layout adjustments
+    plt.xlim(0, 1)
+    plt.ylim(0, 1)
+    plt.axis('off')
+    plt.tight_layout(rect=[0, 0.05, 1, 0.95])
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+# -----------------------------
+# Build
+# -----------------------------
+if __name__ == "__main__":
+    from build import IMAGES, run
+
+    run(IMAGES)
@@ -0,0 +1,233 @@
+"""
+instrument.py
+
+Low-overhead instrumentation for the simulation / forecasting pipeline.
+
+Stages are wrapped with span("name", **attrs) blocks or the @traced()
+decorator. While tracing is off both reduce to a global None check, so
+the hooks can stay in hot paths (CA steps, noise, CSV reads, fit /
+predict). While tracing is on every span records:
+
+- wall time, nested under the span that was open on the same thread
+- allocated-block delta (sys.getallocatedblocks), a cheap allocation count
+- traced bytes / peak (tracemalloc), only when memory tracing is asked for
+- attributes such as rows, shapes and nbytes of the arrays being processed
+
+Switching it on:
+    SIM_TRACE=trace.json python demo_run.py      # Chrome / Perfetto trace events
+    SIM_TRACE=trace.folded python demo_run.py    # folded stacks for flamegraph.pl
+    SIM_TRACE_MEMORY=1                           # add tracemalloc bytes per span
+or from code / a CLI option: enable("trace.json"), then dump() (done at
+exit automatically when enable() got a path).
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+ENV_VAR = "SIM_TRACE"
+ENV_MEMORY = "SIM_TRACE_MEMORY"
+
+_tracer = None
+
+
+# -----------------------------
+# Tracer
+# -----------------------------
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "path", "start", "blocks", "mem")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.path = (stack[-1].path if stack else ()) + (self.name,)
+        stack.append(self)
+        if self.tracer.memory:
+            # nested spans reset the peak too, so peak_bytes is exact for leaf spans
+            tracemalloc.reset_peak()
+            self.mem = tracemalloc.get_traced_memory()[0]
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        event = {
+            "name": self.name,
+            "path": self.path,
+            "start": self.start,
+            "dur": end - self.start,
+            "blocks": sys.getallocatedblocks() - self.blocks,
+            "tid": threading.get_ident(),
+            "attrs": self.attrs,
+        }
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            event["bytes"] = current - self.mem
+            event["peak_bytes"] = peak - self.mem
+        self.tracer.events.append(event)
+        self.tracer.stack().pop()
+        return False
+
+
+class Tracer:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.events = []
+        self.local = threading.local()
+        self.origin = time.perf_counter_ns()
+
+    def stack(self):
+        s = getattr(self.local, "stack", None)
+        if s is None:
+            s = self.local.stack = []
+        return s
+
+    def span(self, name, attrs):
+        return Span(self, name, attrs)
+
+    # -------- output --------
+    def summary(self):
+        """{name: {"calls", "total_ms", "self_ms", "blocks"}} over all events."""
+        out = defaultdict(lambda: {"calls": 0, "total_ms": 0.0, "self_ms": 0.0, "blocks": 0})
+        for path, self_ns in self.self_times().items():
+            out[path[-1]]["self_ms"] += self_ns / 1e6
+        for e in self.events:
+            row = out[e["name"]]
+            row["calls"] += 1
+            row["total_ms"] += e["dur"] / 1e6
+            row["blocks"] += e["blocks"]
+        return dict(out)
+
+    def self_times(self):
+        """Self time (ns) per stack path: own duration minus direct children."""
+        acc = defaultdict(int)
+        for e in self.events:
+            acc[e["path"]] += e["dur"]
+            if len(e["path"]) > 1:
+                acc[e["path"][:-1]] -= e["dur"]
+        return acc
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for e in self.events:
+            args = dict(e["attrs"], blocks=e["blocks"])
+            for k in ("bytes", "peak_bytes"):
+                if k in e:
+                    args[k] = e[k]
+            events.append({"name": e["name"], "ph": "X", "pid": pid, "tid": e["tid"],
+                           "ts": (e["start"] - self.origin) / 1e3, "dur": e["dur"] / 1e3,
+                           "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def folded(self):
+        """Folded stacks ("a;b;c <self microseconds>") for flamegraph.pl / speedscope."""
+        return "".join(f"{';'.join(path)} {max(ns, 0) // 1000}\n"
+                       for path, ns in sorted(self.self_times().items()))
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            if str(path).endswith(".json"):
+                json.dump(self.chrome_trace(), f, default=str)
+            else:
+                f.write(self.folded())
+        return path
+
+
+# -----------------------------
+# Module-level switch
+# -----------------------------
+def enable(path=None, memory=False):
+    """Starts tracing; with `path` the trace is written there at exit."""
+    global _tracer
+    _tracer = Tracer(memory)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if path:
+        atexit.register(_dump_at_exit, _tracer, path)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def _dump_at_exit(tracer, path):
+    tracer.dump(path)
+
+
+def dump(path):
+    if _tracer is not None:
+        return _tracer.dump(path)
+
+
+# -----------------------------
+# Hooks
+# -----------------------------
+def span(name, **attrs):
+    """Context manager timing one stage; free when tracing is off."""
+    if _tracer is None:
+        return NO_SPAN
+    return _tracer.span(name, attrs)
+
+
+def traced(name=None):
+    """Decorator wrapping every call of a function in span(name)."""
+    def wrap(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(label, {}):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def annotate(**attrs):
+    """Adds attributes (rows, shapes, nbytes ...) to the innermost open span."""
+    if _tracer is None:
+        return
+    stack = _tracer.stack()
+    if stack:
+        stack[-1].attrs.update(attrs)
+
+
+def array_attrs(prefix, a):
+    """{"<prefix>_shape": ..., "<prefix>_nbytes": ...} for annotate()."""
+    return {f"{prefix}_shape": list(getattr(a, "shape", ())),
+            f"{prefix}_nbytes": int(getattr(a, "nbytes", 0))}
+
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR], memory=os.environ.get(ENV_MEMORY, "") not in ("", "0"))
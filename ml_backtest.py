@@ -0,0 +1,138 @@
+"""
+ml_backtest.py
+
+Rolling-origin (walk-forward) backtesting over the time-indexed GEFCom
+data, to measure how stable the forecast error is over time.
+
+At every origin the model is trained on rows whose target hour is before
+the origin (expanding window, or the last `window` hours when sliding)
+and scored on the next `refit_every` hours. Work is reused between folds:
+
+- forest:  warm-start; each refit adds `trees_per_refit` trees trained
+           on the current window, and the oldest trees beyond
+           `max_trees` are dropped
+- linear:  X'X / X'y are updated with the rows entering the window and
+           downdated with the rows leaving it, then re-solved
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml_data import format_dates, load_farm
+from simulation_ml import StreamingLinear, rmse
+
+
+# -----------------------------
+# Fold boundaries
+# -----------------------------
+def origins(target, initial=24 * 90, refit_every=24 * 7):
+    """Origin hours from `initial` hours after the first target to the end."""
+    return np.arange(target[0] + initial, target[-1] + 1, refit_every)
+
+
+def fold_slices(target, origin, refit_every, window=None):
+    """Row slices (train, test) for one origin; `target` must be sorted."""
+    lo = target[0] if window is None else origin - window
+    start, end, stop = np.searchsorted(target, [lo, origin, origin + refit_every])
+    return slice(start, end), slice(end, stop)
+
+
+# -----------------------------
+# Incremental models
+# -----------------------------
+class WarmForest:
+    """RandomForestRegressor that grows by warm-start at every refit."""
+
+    def __init__(self, n_estimators=70, trees_per_refit=10, max_trees=None, random_state=42,
+                 **params):
+        from sklearn.ensemble import RandomForestRegressor
+
+        self.n_initial = n_estimators
+        self.trees_per_refit = trees_per_refit
+        self.max_trees = max_trees or n_estimators
+        # sklearn seeds the new trees of a warm start by skipping one draw per
+        # kept tree; with a fixed number of kept trees every refit would reuse
+        # the same seeds, so each refit gets its own random_state
+        self.seeds = np.random.SeedSequence(random_state)
+        self.model = RandomForestRegressor(n_estimators=0, warm_start=True, **params)
+
+    def fit(self, X, y):
+        m = self.model
+        have = len(getattr(m, "estimators_", []))
+        m.random_state = int(self.seeds.spawn(1)[0].generate_state(1)[0])
+        m.n_estimators = have + (self.n_initial if have == 0 else self.trees_per_refit)
+        m.fit(X, y)
+
+        if len(m.estimators_) > self.max_trees:
+            m.estimators_ = m.estimators_[-self.max_trees:]
+            m.n_estimators = len(m.estimators_)
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+# -----------------------------
+# Backtest driver
+# -----------------------------
+def backtest(X, y, target, model="rf", initial=24 * 90, refit_every=24 * 7, window=None,
+             **model_params):
+    """
+    Walk-forward evaluation of rows sorted by target hour.
+    model: "rf" (WarmForest) or "linear" (simulation_ml.StreamingLinear).
+    Returns a DataFrame with one row per fold.
+    """
+    if model == "rf":
+        est = WarmForest(**model_params)
+    elif model == "linear":
+        est = StreamingLinear(**model_params)
+    else:
+        raise ValueError(f"unknown model {model!r}")
+
+    rows = []
+    prev = None
+    for origin in origins(target, initial, refit_every):
+        train, test = fold_slices(target, origin, refit_every, window)
+        if train.stop == train.start or test.stop == test.start:
+            continue
+
+        t0 = time.perf_counter()
+        if prev is not None and model == "linear":
+            est.partial_fit(X[prev.stop:train.stop], y[prev.stop:train.stop])
+            est.downdate(X[prev.start:train.start], y[prev.start:train.start])
+            est.solve()
+        else:
+            est.fit(X[train], y[train])
+        t1 = time.perf_counter()
+        preds = est.predict(X[test])
+        t2 = time.perf_counter()
+        prev = train
+
+        rows.append({
+            "origin": int(format_dates(origin)),
+            "n_train": train.stop - train.start,
+            "n_test": test.stop - test.start,
+            "rmse": rmse(y[test], preds),
+            "fit_s": t1 - t0,
+            "predict_s": t2 - t1,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def backtest_farm(farm=1, horizons=None, latest=False, **kwargs):
+    data = load_farm(farm)
+    idx = data.rows(horizons=horizons, latest=latest)
+    return backtest(data.X[idx], data.y[idx], data.target[idx], **kwargs)
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    for model in ("linear", "rf"):
+        folds = backtest_farm(1, latest=True, model=model)
+        print(f"{model}: {len(folds)} folds, RMSE {folds.rmse.mean():.4f} ± {folds.rmse.std():.4f}, "
+              f"total fit {folds.fit_s.sum():.1f}s")
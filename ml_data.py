@@ -0,0 +1,322 @@
+"""
+ml_data.py
+
+Indexed, horizon-aware loader for the GEFCom2012 wind data.
+
+windforecasts_wf{farm}.csv holds one forecast issue every 12 hours with
+48 horizons each, keyed by (date, hors). train.csv holds hourly power
+wp1..wp7. Every forecast row targets the hour  issue time + hors,
+so forecasts are joined to power on that target time (sorted arrays +
+np.searchsorted, no pandas merges).
+
+Timestamps are integer hours since 1970-01-01 00:00.
+CSVs are parsed once and then read back from a memory-mapped columnar
+cache (see read_table).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrument import annotate, span, traced
+
+DATA_DIR = Path(__file__).parent / "data"
+CACHE_NAME = ".cache"
+FEATURES = ["u", "v", "ws", "wd"]
+N_FARMS = 7
+N_HORIZONS = 48
+
+
+# -----------------------------
+# Dates
+# -----------------------------
+def parse_dates(values):
+    """YYYYMMDDHH integers -> int64 hours since epoch (vectorized)."""
+    values = np.asarray(values, dtype=np.int64)
+    year, rest = np.divmod(values, 1000000)
+    month, rest = np.divmod(rest, 10000)
+    day, hour = np.divmod(rest, 100)
+
+    months = (year - 1970) * 12 + (month - 1)
+    days = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + day - 1
+    return days * 24 + hour
+
+
+def format_dates(hours):
+    """Inverse of parse_dates()."""
+    hours = np.asarray(hours, dtype=np.int64)
+    days, hour = np.divmod(hours, 24)
+    d = days.astype("datetime64[D]")
+    year = d.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = d.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    day = (d - d.astype("datetime64[M]")).astype(np.int64) + 1
+    return ((year * 100 + month) * 100 + day) * 100 + hour
+
+
+# -----------------------------
+# Raw tables (+ columnar cache)
+# -----------------------------
+def _source_stamp(path):
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _cache_path(path, cache_dir):
+    path = Path(path)
+    return Path(cache_dir or path.parent / CACHE_NAME) / f"{path.name}.cols"
+
+
+def _read_cache(path, cache_dir):
+    folder = _cache_path(path, cache_dir)
+    try:
+        with open(folder / "meta.json") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("source") != _source_stamp(path):
+        return None
+    return {c: np.load(folder / f"{c}.npy", mmap_mode="r") for c in meta["columns"]}
+
+
+def _write_cache(path, cache_dir, cols):
+    """One .npy per column, written to a temp folder and renamed into place."""
+    folder = _cache_path(path, cache_dir)
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=folder.parent, prefix=folder.name + "."))
+    try:
+        for c, values in cols.items():
+            np.save(tmp / f"{c}.npy", values)
+        meta = {"source": _source_stamp(path), "columns": list(cols)}
+        with open(tmp / "meta.json", "w") as f:
+            json.dump(meta, f)
+        if folder.exists():
+            shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+    except OSError:
+        # another process won the race or the cache dir is read-only
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@traced("csv.read")
+def read_table(path, cache=True, cache_dir=None):
+    """
+    Reads one CSV into a dict of numpy columns.
+
+    With cache=True the first read also stores every column as a typed
+    .npy file under cache_dir (default: a .cache folder next to the CSV),
+    keyed on the CSV's mtime and size. Later reads memory-map those files
+    (np.load(mmap_mode="r")), so they are almost free and processes share
+    the same pages.
+    """
+    annotate(file=Path(path).name)
+    if cache:
+        cols = _read_cache(path, cache_dir)
+        if cols is not None:
+            annotate(cached=True, rows=len(next(iter(cols.values()))))
+            return cols
+
+    with span("csv.parse"):
+        df = pd.read_csv(path)
+    annotate(cached=False, rows=len(df))
+    cols = {}
+    for c in df.columns:
+        values = df[c].to_numpy()
+        cols[c] = values.astype(str) if values.dtype == object else values
+
+    if cache:
+        _write_cache(path, cache_dir, cols)
+    return cols
+
+
+def load_targets(data_dir=DATA_DIR):
+    """train.csv -> (sorted target times, (n, 7) power array)."""
+    cols = read_table(Path(data_dir) / "train.csv")
+    times = parse_dates(cols["date"])
+    power = np.column_stack([cols[f"wp{f}"] for f in range(1, N_FARMS + 1)]).astype(float)
+    order = np.argsort(times, kind="stable")
+    return times[order], power[order]
+
+
+@traced("align.join")
+def join_targets(target, times, values):
+    """
+    Looks every entry of `target` up in the sorted `times` array.
+    Returns values[pos] with NaN where the hour has no observation.
+    """
+    pos = np.searchsorted(times, target)
+    pos = np.minimum(pos, len(times) - 1)
+    hit = times[pos] == target
+    out = np.full(len(target), np.nan)
+    out[hit] = values[pos[hit]]
+    annotate(rows=len(target), matched=int(hit.sum()))
+    return out
+
+
+# -----------------------------
+# One farm
+# -----------------------------
+class FarmData:
+    """
+    Forecast rows of one farm joined to its power, sorted by
+    (target time, horizon). All selections are index operations.
+    """
+
+    def __init__(self, farm, issue, hors, X, y):
+        target = issue + hors
+        order = np.lexsort((hors, target))
+        self.farm = farm
+        self.issue = issue[order]
+        self.hors = hors[order]
+        self.target = target[order]
+        self.X = X[order]
+        self.y = y[order]
+        self.valid = ~np.isnan(self.X).any(axis=1)
+
+    def __len__(self):
+        return len(self.target)
+
+    def rows(self, horizons=None, latest=False, dropna=True, observed=None):
+        """
+        Indices of the selected rows, in target-time order.
+        horizons: iterable of horizons to keep (None = all 1..48)
+        latest:   keep only the most recent forecast (smallest horizon)
+                  for every target hour
+        dropna:   drop rows with missing features
+        observed: drop rows with no observed power (defaults to dropna);
+                  observed=False keeps e.g. test-period hours
+        """
+        if observed is None:
+            observed = dropna
+        keep = np.ones(len(self), dtype=bool)
+        if horizons is not None:
+            lut = np.zeros(N_HORIZONS + 1, dtype=bool)
+            lut[np.asarray(list(horizons))] = True
+            keep &= lut[self.hors]
+        if dropna:
+            keep &= self.valid
+
+        idx = np.flatnonzero(keep)
+        if latest and len(idx):
+            # rows are sorted by (target, hors): first row of each target wins
+            first = np.r_[True, self.target[idx][1:] != self.target[idx][:-1]]
+            idx = idx[first]
+        if observed:
+            idx = idx[~np.isnan(self.y[idx])]
+        return idx
+
+    def select(self, horizons=None, latest=False, dropna=True):
+        idx = self.rows(horizons, latest, dropna)
+        return self.X[idx], self.y[idx]
+
+
+@traced("align.load_farm")
+def load_farm(farm=1, data_dir=DATA_DIR, targets=None):
+    """
+    Loads windforecasts_wf{farm}.csv and joins it to wp{farm}.
+    `targets` can pass an already loaded load_targets() result.
+    """
+    times, power = targets if targets is not None else load_targets(data_dir)
+    cols = read_table(Path(data_dir) / f"windforecasts_wf{farm}.csv")
+
+    issue = parse_dates(cols["date"])
+    hors = cols["hors"].astype(np.int64)
+    X = np.column_stack([cols[c] for c in FEATURES]).astype(float)
+    y = join_targets(issue + hors, times, power[:, farm - 1])
+    return FarmData(farm, issue, hors, X, y)
+
+
+# -----------------------------
+# All farms at once
+# -----------------------------
+class MultiFarmData:
+    """
+    Forecasts of several farms on one shared issue-time index.
+
+    X: (farm, time, horizon, feature) with NaN where a forecast is missing
+    y: (farm, time, horizon) power observed at the target hour, or NaN
+    times: int64 issue hours; target hour of [t, h] is times[t] + h + 1
+    targets: the load_targets() (hours, power) pair the data was joined to
+    """
+
+    def __init__(self, farms, times, X, y, targets=None):
+        self.farms = list(farms)
+        self.times = times
+        self.X = X
+        self.y = y
+        self.targets = targets
+        self.hors = np.arange(1, X.shape[2] + 1)
+        self.target = times[:, None] + self.hors
+
+    def feature(self, name):
+        """(farm, time, horizon) slice of one feature, e.g. feature("ws")."""
+        return self.X[..., FEATURES.index(name)]
+
+    def rows(self, farm, horizons=None, neighbours=(), dropna=True):
+        """
+        Flat training rows for one farm, sorted by (target time, horizon).
+
+        neighbours: feature names to add from every other farm at the same
+        (issue time, horizon), e.g. ("ws", "u", "v") for spatial checks.
+        Returns X, y.
+        """
+        k = self.farms.index(farm)
+        h = slice(None) if horizons is None else np.asarray(list(horizons)) - 1
+
+        parts = [self.X[k][:, h]]
+        if neighbours:
+            cols = [FEATURES.index(n) for n in neighbours]
+            others = [j for j in range(len(self.farms)) if j != k]
+            nb = self.X[others][:, :, h][..., cols]            # (farm, T, H, F)
+            parts.append(np.moveaxis(nb, 0, -2).reshape(nb.shape[1:3] + (-1,)))
+
+        X = np.concatenate(parts, axis=-1)
+        X = X.reshape(-1, X.shape[-1])
+        y = self.y[k][:, h].reshape(-1)
+        target = self.target[:, h].reshape(-1)
+        hors = np.broadcast_to(self.hors[h], self.target[:, h].shape).reshape(-1)
+
+        order = np.lexsort((hors, target))
+        X, y = X[order], y[order]
+        if dropna:
+            ok = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+            X, y = X[ok], y[ok]
+        return X, y
+
+
+@traced("align.load_all_farms")
+def load_all_farms(data_dir=DATA_DIR, farms=range(1, N_FARMS + 1), threads=None):
+    """
+    Reads train.csv once and every windforecasts_wf*.csv (on a thread pool
+    when threads > 1) into one MultiFarmData.
+    """
+    farms = list(farms)
+    times_t, power = load_targets(data_dir)
+
+    def read(farm):
+        return read_table(Path(data_dir) / f"windforecasts_wf{farm}.csv")
+
+    if threads and threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            tables = list(pool.map(read, farms))
+    else:
+        tables = [read(f) for f in farms]
+
+    issues = [parse_dates(t["date"]) for t in tables]
+    times = np.unique(np.concatenate(issues))
+
+    X = np.full((len(farms), len(times), N_HORIZONS, len(FEATURES)), np.nan)
+    for k, (t, issue) in enumerate(zip(tables, issues)):
+        ti = np.searchsorted(times, issue)
+        hi = np.asarray(t["hors"], dtype=np.int64) - 1
+        X[k, ti, hi] = np.column_stack([t[c] for c in FEATURES])
+
+    target = (times[:, None] + np.arange(1, N_HORIZONS + 1)).reshape(-1)
+    y = np.stack([join_targets(target, times_t, power[:, f - 1]).reshape(len(times), N_HORIZONS)
+                  for f in farms])
+    return MultiFarmData(farms, times, X, y, (times_t, power))
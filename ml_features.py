@@ -0,0 +1,279 @@
+"""
+ml_features.py
+
+Declarative feature pipeline over the time-indexed GEFCom data
+(ml_data.MultiFarmData: one (issue time, horizon) grid per farm).
+
+Features are registered with @feature(name, deps=..., **params) and
+computed lazily, fully vectorized, only when asked for. Every computed
+column is memoized on disk under a key made of its definition (name,
+params, source code and that of the repo helpers it calls, dependency
+keys) and a fingerprint of the farm's input data, so adding or changing
+one feature recomputes just that feature and reuses every other cached
+column.
+
+Built-in features:
+    u, v, ws, wd          raw forecasts
+    ws3                   ws ** 3 (power curve is roughly cubic)
+    wd_cyc                sin / cos of wind direction
+    hour_cyc              sin / cos of the target hour of day
+    horizon_onehot        one column per horizon 1..48
+    ws_roll_mean/_std     rolling ws statistics along the forecast horizon
+    power_lag             power observed `lags` hours before issue time
+"""
+
+import dis
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from ml_data import DATA_DIR, FEATURES as RAW_FEATURES, N_HORIZONS, join_targets
+from ml_registry import data_fingerprint
+
+FEATURE_CACHE = DATA_DIR / ".cache" / "features"
+REPO_DIR = Path(__file__).resolve().parent
+
+REGISTRY = {}
+
+
+# -----------------------------
+# Declaration
+# -----------------------------
+class Feature:
+    def __init__(self, name, func, deps=(), **params):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.params = params
+
+    def definition(self):
+        return {"name": self.name, "params": self.params, "source": _source(self.func),
+                "helpers": {h.__name__: _source(h) for h in _helpers(self.func)}}
+
+
+def _source(func):
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return func.__qualname__
+
+
+def _in_repo(func):
+    try:
+        return Path(inspect.getsourcefile(func)).resolve().parent == REPO_DIR
+    except TypeError:
+        return False
+
+
+def _globals_used(code):
+    """Global names loaded by a code object and the comprehensions / lambdas in it."""
+    names = {i.argval for i in dis.get_instructions(code) if i.opname == "LOAD_GLOBAL"}
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _globals_used(const)
+    return names
+
+
+def _helpers(func):
+    """
+    Functions of this repository (module helpers such as _rolling, or
+    imported ones such as ml_data.join_targets) that func calls, directly
+    or through other helpers, so editing one changes the key of every
+    feature built on it.
+    """
+    found, todo = {}, [func]
+    while todo:
+        for name in _globals_used(todo.pop().__code__):
+            h = func.__globals__.get(name)
+            if (inspect.isfunction(h) and name not in found and h is not func
+                    and _in_repo(h)):
+                found[name] = h
+                todo.append(h)
+    return [found[n] for n in sorted(found)]
+
+
+def feature(name, deps=(), **params):
+    """Decorator registering func(pipeline, farm, **params) -> (T, H[, k]) array."""
+    def wrap(func):
+        REGISTRY[name] = Feature(name, func, deps, **params)
+        return func
+    return wrap
+
+
+# -----------------------------
+# Built-in features
+# -----------------------------
+def _raw(name):
+    def raw(p, farm):
+        return p.data.feature(name)[p.farm_index(farm)]
+    raw.__qualname__ = f"raw_{name}"
+    return raw
+
+
+for _name in RAW_FEATURES:
+    REGISTRY[_name] = Feature(_name, _raw(_name))
+
+
+@feature("ws3", deps=("ws",))
+def ws_cubed(p, farm):
+    return p.get("ws", farm) ** 3
+
+
+@feature("wd_cyc", deps=("wd",))
+def wd_cyclic(p, farm):
+    rad = np.deg2rad(p.get("wd", farm))
+    return np.stack([np.sin(rad), np.cos(rad)], axis=-1)
+
+
+@feature("hour_cyc")
+def hour_cyclic(p, farm):
+    angle = 2 * np.pi * (p.data.target % 24) / 24.0
+    return np.stack([np.sin(angle), np.cos(angle)], axis=-1)
+
+
+@feature("horizon_onehot")
+def horizon_onehot(p, farm):
+    T = len(p.data.times)
+    eye = np.eye(N_HORIZONS)
+    return np.broadcast_to(eye, (T, N_HORIZONS, N_HORIZONS)).copy()
+
+
+def _rolling(x, window):
+    """Centered rolling mean / std along the horizon axis (NaN-aware)."""
+    ok = ~np.isnan(x)
+    xv = np.where(ok, x, 0.0)
+    pad = window // 2
+    cs = np.pad(np.cumsum(xv, axis=1), ((0, 0), (1, 0)))
+    cs2 = np.pad(np.cumsum(xv ** 2, axis=1), ((0, 0), (1, 0)))
+    cn = np.pad(np.cumsum(ok, axis=1), ((0, 0), (1, 0)))
+
+    H = x.shape[1]
+    lo = np.clip(np.arange(H) - pad, 0, H)
+    hi = np.clip(np.arange(H) + window - pad, 0, H)
+    n = cn[:, hi] - cn[:, lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cs[:, hi] - cs[:, lo]) / n
+        var = (cs2[:, hi] - cs2[:, lo]) / n - mean ** 2
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+@feature("ws_roll_mean", deps=("ws",), window=6)
+def ws_roll_mean(p, farm, window):
+    return _rolling(p.get("ws", farm), window)[0]
+
+
+@feature("ws_roll_std", deps=("ws",), window=6)
+def ws_roll_std(p, farm, window):
+    return _rolling(p.get("ws", farm), window)[1]
+
+
+@feature("power_lag", lags=(0, 1, 2))
+def power_lag(p, farm, lags):
+    hours, power = p.data.targets
+    series = power[:, farm - 1]
+    cols = [join_targets(p.data.times - lag, hours, series) for lag in lags]
+    lagged = np.stack(cols, axis=-1)                      # (T, n_lags)
+    return np.broadcast_to(lagged[:, None, :], (len(p.data.times), N_HORIZONS, len(lags))).copy()
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+class FeaturePipeline:
+    """Lazily computed, disk-memoized features for one MultiFarmData."""
+
+    def __init__(self, data, registry=None, cache_dir=FEATURE_CACHE):
+        self.data = data
+        self.registry = REGISTRY if registry is None else registry
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.memo = {}
+        self.fingerprints = {}
+        self.computed = []      # (name, farm) computed in this process
+
+    def farm_index(self, farm):
+        return self.data.farms.index(farm)
+
+    def fingerprint(self, farm):
+        if farm not in self.fingerprints:
+            k = self.farm_index(farm)
+            arrays = [self.data.times, self.data.X[k], self.data.y[k]]
+            if self.data.targets is not None:
+                arrays += [self.data.targets[0], self.data.targets[1][:, farm - 1]]
+            self.fingerprints[farm] = data_fingerprint(*arrays)
+        return self.fingerprints[farm]
+
+    def key(self, name, farm):
+        f = self.registry[name]
+        spec = {
+            "feature": f.definition(),
+            "deps": [self.key(d, farm) for d in f.deps],
+            "data": self.fingerprint(farm),
+        }
+        blob = json.dumps(spec, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()[:32]
+
+    def get(self, name, farm):
+        """(T, H) or (T, H, k) array of one feature, computed at most once."""
+        if (name, farm) in self.memo:
+            return self.memo[(name, farm)]
+
+        key = self.key(name, farm)
+        path = self.cache_dir / f"{name}-{key}.npy" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            values = np.load(path, mmap_mode="r")
+        else:
+            f = self.registry[name]
+            values = np.asarray(f.func(self, farm, **f.params), dtype=float)
+            self.computed.append((name, farm))
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".npy")
+                with os.fdopen(fd, "wb") as fh:
+                    np.save(fh, values)
+                os.replace(tmp, path)
+
+        self.memo[(name, farm)] = values
+        return values
+
+    def matrix(self, farm, names, horizons=None, dropna=True):
+        """
+        Stacks the named features into flat rows sorted by
+        (target time, horizon), like MultiFarmData.rows(). Returns X, y.
+        """
+        h = slice(None) if horizons is None else np.asarray(list(horizons)) - 1
+        cols = []
+        for name in names:
+            values = self.get(name, farm)[:, h]
+            cols.append(values if values.ndim == 3 else values[..., None])
+        X = np.concatenate(cols, axis=-1)
+        X = X.reshape(-1, X.shape[-1])
+
+        k = self.farm_index(farm)
+        y = self.data.y[k][:, h].reshape(-1)
+        target = self.data.target[:, h].reshape(-1)
+        hors = np.broadcast_to(self.data.hors[h], self.data.target[:, h].shape).reshape(-1)
+
+        order = np.lexsort((hors, target))
+        X, y = X[order], y[order]
+        if dropna:
+            ok = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+            X, y = X[ok], y[ok]
+        return X, y
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    from ml_data import load_all_farms
+
+    names = ["u", "v", "ws", "wd", "ws3", "wd_cyc", "hour_cyc", "ws_roll_mean", "ws_roll_std",
+             "power_lag"]
+    pipe = FeaturePipeline(load_all_farms())
+    X, y = pipe.matrix(1, names)
+    print("Feature matrix:", X.shape, "computed now:", [n for n, _ in pipe.computed])
@@ -0,0 +1,324 @@
+"""
+ml_monitor.py
+
+Streaming drift monitor and retraining trigger for the wind power
+forecasts (the "Monitoring & Feedback" box of images.py).
+
+The monitor consumes (prediction, actual) pairs one farm / issue time at
+a time and never looks back at history:
+
+- ErrorTracker: exponentially weighted sums of error, squared error and
+  weight per (farm, horizon) -> rolling RMSE and bias in O(farms x 48)
+- BinSketch:    fixed-bin, exponentially weighted histograms of ws / wd
+  per farm, compared with a frozen reference histogram through the
+  population stability index (PSI)
+- Retrainer:    fixed-size ring buffer of the latest labelled rows per
+  farm; an alert refits the farm through simulation_ml.train_and_evaluate
+
+replay() streams the GEFCom data through the monitor: models are fitted
+on the first part of the data and every later issue time is fed in
+order, as soon as all of its actuals are known, retraining whenever the
+monitor fires.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from ml_data import FEATURES, N_HORIZONS
+from simulation_ml import train_and_evaluate
+
+WS_EDGES = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 15, np.inf])
+WD_EDGES = np.linspace(0, 360, 13)
+
+
+# -----------------------------
+# Rolling error per (farm, horizon)
+# -----------------------------
+class ErrorTracker:
+    """
+    Exponentially weighted RMSE / bias. Every update of a farm decays its
+    accumulators by 0.5 ** (1 / halflife) first, so `halflife` is counted
+    in updates (issue times), not rows.
+    """
+
+    def __init__(self, n_farms, n_horizons=N_HORIZONS, halflife=60):
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.w = np.zeros((n_farms, n_horizons))
+        self.s1 = np.zeros((n_farms, n_horizons))
+        self.s2 = np.zeros((n_farms, n_horizons))
+
+    def update(self, k, hors, err):
+        h = np.asarray(hors) - 1
+        for acc in (self.w, self.s1, self.s2):
+            acc[k] *= self.decay
+        n = self.w.shape[1]
+        self.w[k] += np.bincount(h, minlength=n)
+        self.s1[k] += np.bincount(h, weights=err, minlength=n)
+        self.s2[k] += np.bincount(h, weights=err * err, minlength=n)
+
+    def reset(self, k):
+        for acc in (self.w, self.s1, self.s2):
+            acc[k] = 0.0
+
+    def rmse(self, k=slice(None)):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.s2[k] / self.w[k])
+
+    def bias(self, k=slice(None)):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.s1[k] / self.w[k]
+
+    def pooled(self, k):
+        """(RMSE, bias, weight) of farm k over all horizons."""
+        w = self.w[k].sum()
+        if w == 0:
+            return np.nan, np.nan, 0.0
+        return np.sqrt(self.s2[k].sum() / w), self.s1[k].sum() / w, w
+
+
+# -----------------------------
+# Input distribution sketches
+# -----------------------------
+class BinSketch:
+    """Fixed-bin decayed histogram per farm against a reference histogram."""
+
+    def __init__(self, edges, n_farms, halflife=60):
+        self.edges = np.asarray(edges, dtype=float)
+        self.decay = 0.5 ** (1.0 / halflife)
+        n_bins = len(self.edges) - 1
+        self.ref = np.zeros((n_farms, n_bins))
+        self.cur = np.zeros((n_farms, n_bins))
+
+    def counts(self, x):
+        x = np.asarray(x, dtype=float)
+        x = x[~np.isnan(x)]
+        b = np.clip(np.searchsorted(self.edges, x, side="right") - 1, 0, len(self.edges) - 2)
+        return np.bincount(b, minlength=len(self.edges) - 1)
+
+    def set_reference(self, k, x):
+        self.ref[k] = self.counts(x)
+        self.cur[k] = 0.0
+
+    def update(self, k, x):
+        self.cur[k] *= self.decay
+        self.cur[k] += self.counts(x)
+
+    def weight(self, k):
+        return self.cur[k].sum()
+
+    def psi(self, k, eps=1e-4):
+        """Population stability index of the current vs. reference histogram."""
+        p = self.ref[k] / max(self.ref[k].sum(), 1.0) + eps
+        q = self.cur[k] / max(self.cur[k].sum(), 1.0) + eps
+        return float(((q - p) * np.log(q / p)).sum())
+
+
+# -----------------------------
+# Monitor
+# -----------------------------
+class DriftMonitor:
+    """
+    Fires alerts for one farm when, on enough decayed weight,
+    - its rolling RMSE (pooled over horizons) exceeds rmse_ratio x the
+      reference RMSE
+    - its rolling bias exceeds bias_limit in absolute value
+    - the PSI of ws or wd exceeds psi_limits[name]
+
+    Tests are pooled over horizons: errors of one issue time are strongly
+    correlated, and 48 separate tests would fire on noise alone. The
+    per-horizon RMSE / bias stay available via .errors. wd has the looser
+    PSI limit because wind direction follows weather regimes that come
+    and go within a couple of weeks.
+    """
+
+    def __init__(self, farms, halflife=60, rmse_ratio=1.3, bias_limit=0.1,
+                 psi_limits=None, min_weight=10.0):
+        self.farms = list(farms)
+        F = len(self.farms)
+        self.errors = ErrorTracker(F, N_HORIZONS, halflife)
+        self.sketches = {"ws": BinSketch(WS_EDGES, F, halflife),
+                         "wd": BinSketch(WD_EDGES, F, halflife)}
+        self.ref_rmse = np.full(F, np.nan)
+        self.rmse_ratio = rmse_ratio
+        self.bias_limit = bias_limit
+        self.psi_limits = {"ws": 0.5, "wd": 1.0, **(psi_limits or {})}
+        self.min_weight = min_weight
+
+    def set_reference(self, farm, hors, X, err):
+        """Reference RMSE and ws / wd histograms, e.g. from validation rows."""
+        k = self.farms.index(farm)
+        self.ref_rmse[k] = np.sqrt(np.mean(np.asarray(err) ** 2))
+        for name, sketch in self.sketches.items():
+            sketch.set_reference(k, X[:, FEATURES.index(name)])
+        self.errors.reset(k)
+
+    def observe(self, farm, hors, X, y_pred, y_true):
+        """Feeds one batch of pairs of one farm; returns a list of alert dicts."""
+        k = self.farms.index(farm)
+        ok = ~np.isnan(y_true) & ~np.isnan(y_pred)
+        self.errors.update(k, np.asarray(hors)[ok], (y_pred - y_true)[ok])
+        for name, sketch in self.sketches.items():
+            sketch.update(k, X[:, FEATURES.index(name)])
+        return self.check(farm)
+
+    def check(self, farm):
+        k = self.farms.index(farm)
+        alerts = []
+        rmse, bias, w = self.errors.pooled(k)
+        if w >= self.min_weight * N_HORIZONS:
+            ratio = rmse / self.ref_rmse[k]
+            if ratio > self.rmse_ratio:
+                alerts.append({"farm": farm, "kind": "rmse", "value": float(ratio),
+                               "limit": self.rmse_ratio})
+            if abs(bias) > self.bias_limit:
+                alerts.append({"farm": farm, "kind": "bias", "value": float(bias),
+                               "limit": self.bias_limit})
+
+        for name, sketch in self.sketches.items():
+            if sketch.weight(k) >= self.min_weight * N_HORIZONS:
+                psi = sketch.psi(k)
+                if psi > self.psi_limits[name]:
+                    alerts.append({"farm": farm, "kind": name, "value": psi,
+                                   "limit": self.psi_limits[name]})
+        return alerts
+
+
+# -----------------------------
+# Retraining
+# -----------------------------
+class Retrainer:
+    """
+    Ring buffer of the latest `capacity` labelled rows per farm. retrain()
+    refits on the older part of the buffer and validates on the newest
+    `val_fraction` through train_and_evaluate.
+    """
+
+    def __init__(self, farms, capacity=24 * 400, val_fraction=0.2, **model_params):
+        self.farms = list(farms)
+        self.capacity = capacity
+        self.val_fraction = val_fraction
+        self.model_params = model_params
+        F = len(self.farms)
+        self.X = np.empty((F, capacity, len(FEATURES)))
+        self.y = np.empty((F, capacity))
+        self.hors = np.zeros((F, capacity), dtype=np.int64)
+        self.pos = np.zeros(F, dtype=np.int64)
+        self.count = np.zeros(F, dtype=np.int64)
+
+    def add(self, farm, hors, X, y):
+        k = self.farms.index(farm)
+        ok = ~np.isnan(y) & ~np.isnan(X).any(axis=1)
+        X, y, hors = X[ok][-self.capacity:], y[ok][-self.capacity:], np.asarray(hors)[ok][-self.capacity:]
+        idx = (self.pos[k] + np.arange(len(y))) % self.capacity
+        self.X[k, idx], self.y[k, idx], self.hors[k, idx] = X, y, hors
+        self.pos[k] = (self.pos[k] + len(y)) % self.capacity
+        self.count[k] = min(self.count[k] + len(y), self.capacity)
+
+    def rows(self, farm):
+        """Buffered rows of one farm, oldest first."""
+        k = self.farms.index(farm)
+        n = self.count[k]
+        idx = (self.pos[k] - n + np.arange(n)) % self.capacity
+        return self.hors[k, idx], self.X[k, idx], self.y[k, idx]
+
+    def retrain(self, farm):
+        """Returns (validation RMSE, model, (hors, X, err) of the validation rows)."""
+        hors, X, y = self.rows(farm)
+        cut = int(len(y) * (1 - self.val_fraction))
+        score, model = train_and_evaluate(X[:cut], y[:cut], X[cut:], y[cut:], **self.model_params)
+        return score, model, (hors[cut:], X[cut:], model.predict(X[cut:]) - y[cut:])
+
+
+# -----------------------------
+# Replay over the GEFCom data
+# -----------------------------
+def replay(data, farms=None, start=0.3, cooldown=60, monitor=None, retrainer=None,
+           **model_params):
+    """
+    Streams a MultiFarmData through the monitor one issue time at a time.
+    Each farm starts from a model fitted on the first `start` fraction of
+    issue times. An issue's (prediction, actual) pairs and its rows for
+    the retrainer are only released once its latest target hour has
+    passed (N_HORIZONS hours, i.e. 4 issue times later), so a retrain
+    never sees actuals of forecasts that are still open. A farm that
+    fired is not retrained again for `cooldown` issue times.
+
+    Returns (events DataFrame, seconds spent inside the monitor).
+    """
+    farms = data.farms if farms is None else list(farms)
+    monitor = monitor or DriftMonitor(farms)
+    retrainer = retrainer or Retrainer(farms, **model_params)
+
+    T = len(data.times)
+    t0 = int(T * start)
+    preds = np.full((len(farms), T, N_HORIZONS), np.nan)
+    hors_all = data.hors
+    last_target = data.target[:, -1]
+
+    def predict_from(k, model, t):
+        X = data.X[data.farms.index(farms[k]), t:].reshape(-1, len(FEATURES))
+        ok = ~np.isnan(X).any(axis=1)
+        flat = np.full(len(X), np.nan)
+        if ok.any():
+            flat[ok] = model.predict(X[ok])
+        preds[k, t:] = flat.reshape(-1, N_HORIZONS)
+
+    # issues before t0 whose targets are all observed by then; the rest wait
+    n0 = int(np.searchsorted(last_target[:t0], data.times[t0], side="right"))
+    pending = deque(range(n0, t0))
+    for k, farm in enumerate(farms):
+        j = data.farms.index(farm)
+        hors = np.broadcast_to(hors_all, (n0, N_HORIZONS)).reshape(-1)
+        retrainer.add(farm, hors, data.X[j, :n0].reshape(-1, len(FEATURES)), data.y[j, :n0].reshape(-1))
+        score, model, ref = retrainer.retrain(farm)
+        monitor.set_reference(farm, *ref)
+        predict_from(k, model, t0)
+
+    events = []
+    last_fit = np.full(len(farms), t0)
+    spent = 0.0
+    for t in range(t0, T):
+        # release issues whose last target hour has passed, then issue t
+        while pending and last_target[pending[0]] <= data.times[t]:
+            i = pending.popleft()
+            for k, farm in enumerate(farms):
+                j = data.farms.index(farm)
+                X, y = data.X[j, i], data.y[j, i]
+                ok = ~np.isnan(X).any(axis=1)
+                if not ok.any():
+                    continue
+
+                s = time.perf_counter()
+                alerts = monitor.observe(farm, hors_all[ok], X[ok], preds[k, i][ok], y[ok])
+                spent += time.perf_counter() - s
+                retrainer.add(farm, hors_all, X, y)
+
+                if alerts and t - last_fit[k] >= cooldown:
+                    score, model, ref = retrainer.retrain(farm)
+                    monitor.set_reference(farm, *ref)
+                    predict_from(k, model, t)
+                    last_fit[k] = t
+                    for a in alerts:
+                        events.append(dict(a, issue=int(data.times[t]), observed=int(data.times[i]),
+                                           retrained=True, new_rmse=score))
+        pending.append(t)
+
+    return pd.DataFrame(events), spent
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    from ml_data import load_all_farms
+
+    data = load_all_farms()
+    t0 = time.perf_counter()
+    events, spent = replay(data)
+    n_obs = len(data.farms) * int(len(data.times) * 0.7)
+    print(events.groupby(["farm", "kind"]).size().unstack(fill_value=0))
+    print(f"Monitor: {spent * 1e6 / n_obs:.1f} µs per farm update; "
+          f"replay total {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,146 @@
+"""
+ml_quantile.py
+
+Probabilistic (quantile) forecasts from one fitted RandomForestRegressor,
+quantile-regression-forest style (Meinshausen, 2006).
+
+For every tree the training targets are grouped by leaf once
+(leaf -> slice of sorted targets). A query row then gets, from every
+tree, the targets sharing its leaf, each weighted 1 / (n_trees * leaf
+size); the predictive quantiles are weighted quantiles of those targets.
+One fit gives every requested quantile - no forest per quantile and no
+extra bootstraps.
+"""
+
+import numpy as np
+
+from simulation_ml import rmse, train_and_evaluate
+
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+
+# -----------------------------
+# Leaf -> training target index
+# -----------------------------
+class QuantileForest:
+    """Wraps a fitted forest and its training data for quantile prediction."""
+
+    def __init__(self, model, X_train, y_train):
+        self.model = model
+        y_train = np.asarray(y_train, dtype=float)
+        leaves = model.apply(X_train)                 # (n_train, n_trees)
+
+        self.starts = []
+        self.counts = []
+        self.targets = []
+        for t, tree in enumerate(model.estimators_):
+            leaf = leaves[:, t]
+            order = np.argsort(leaf, kind="stable")
+            counts = np.bincount(leaf, minlength=tree.tree_.node_count)
+            self.starts.append(np.cumsum(counts) - counts)
+            self.counts.append(counts)
+            self.targets.append(y_train[order])
+
+    @property
+    def n_trees(self):
+        return len(self.targets)
+
+    def _gather(self, leaves):
+        """Flat (query, target, weight) arrays for the rows of one chunk."""
+        nq = leaves.shape[0]
+        qs, ys, ws = [], [], []
+        for t in range(self.n_trees):
+            leaf = leaves[:, t]
+            c = self.counts[t][leaf]
+            total = c.sum()
+            first = np.repeat(np.cumsum(c) - c, c)
+            idx = np.repeat(self.starts[t][leaf], c) + np.arange(total) - first
+            qs.append(np.repeat(np.arange(nq), c))
+            ys.append(self.targets[t][idx])
+            ws.append(np.repeat(1.0 / (self.n_trees * c), c))
+        return np.concatenate(qs), np.concatenate(ys), np.concatenate(ws)
+
+    def predict_quantiles(self, X, quantiles=DEFAULT_QUANTILES, chunk=2048):
+        """Returns an (n_rows, n_quantiles) array."""
+        quantiles = np.asarray(quantiles, dtype=float)
+        out = np.empty((len(X), len(quantiles)))
+
+        for i in range(0, len(X), chunk):
+            leaves = self.model.apply(X[i:i + chunk])
+            nq = len(leaves)
+            q, y, w = self._gather(leaves)
+
+            order = np.lexsort((y, q))
+            q, y, w = q[order], y[order], w[order]
+
+            # cumulative weight inside each query's group lies in (0, 1];
+            # 2 * q + cw is then increasing across groups
+            cw = np.cumsum(w)
+            group_end = np.searchsorted(q, np.arange(nq), side="right") - 1
+            group_start = np.r_[0, group_end[:-1] + 1]
+            base = cw[group_start] - w[group_start]
+            key = 2.0 * q + (cw - base[q])
+
+            want = 2.0 * np.arange(nq)[:, None] + quantiles[None, :] - 1e-12
+            pos = np.searchsorted(key, want.ravel()).reshape(want.shape)
+            pos = np.minimum(pos, group_end[:, None])
+            out[i:i + nq] = y[pos]
+
+        return out
+
+
+# -----------------------------
+# Scores
+# -----------------------------
+def pinball_loss(y_true, q_pred, quantiles=DEFAULT_QUANTILES):
+    """Mean pinball (quantile) loss per quantile."""
+    diff = np.asarray(y_true, dtype=float)[:, None] - q_pred
+    tau = np.asarray(quantiles, dtype=float)[None, :]
+    return np.maximum(tau * diff, (tau - 1) * diff).mean(axis=0)
+
+
+def interval_coverage(y_true, lower, upper):
+    """Fraction of observations inside [lower, upper]."""
+    y_true = np.asarray(y_true, dtype=float)
+    return float(((y_true >= lower) & (y_true <= upper)).mean())
+
+
+# -----------------------------
+# Probabilistic train + evaluate
+# -----------------------------
+def train_and_evaluate_quantiles(X_train, y_train, X_val, y_val, quantiles=DEFAULT_QUANTILES,
+                                 random_state=42, **model_params):
+    """
+    Fits one forest via simulation_ml.train_and_evaluate and scores its
+    predictive quantiles. The outermost quantiles form the interval whose
+    coverage is reported. Returns (scores dict, QuantileForest).
+    """
+    score, model = train_and_evaluate(X_train, y_train, X_val, y_val, use_rf=True,
+                                      random_state=random_state, **model_params)
+    qrf = QuantileForest(model, X_train, y_train)
+    q_pred = qrf.predict_quantiles(X_val, quantiles)
+
+    lo, hi = np.argmin(quantiles), np.argmax(quantiles)
+    scores = {
+        "rmse": score,
+        "pinball": {q: float(v) for q, v in zip(quantiles, pinball_loss(y_val, q_pred, quantiles))},
+        "nominal_coverage": quantiles[hi] - quantiles[lo],
+        "coverage": interval_coverage(y_val, q_pred[:, lo], q_pred[:, hi]),
+        "mean_width": float((q_pred[:, hi] - q_pred[:, lo]).mean()),
+    }
+    if 0.5 in quantiles:
+        scores["median_rmse"] = rmse(y_val, q_pred[:, list(quantiles).index(0.5)])
+    return scores, qrf
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    from simulation_ml import load_data
+
+    X, y = load_data(farm=1, latest=True)
+    split = int(len(X) * 0.7)
+    scores, _ = train_and_evaluate_quantiles(X[:split], y[:split], X[split:], y[split:])
+    for k, v in scores.items():
+        print(f"{k}: {v}")
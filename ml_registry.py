@@ -0,0 +1,185 @@
+"""
+ml_registry.py
+
+Versioned on-disk model registry.
+
+Every trained model is stored under a content hash of what produced it:
+farm, feature set, hyperparameters and a fingerprint of the training /
+validation data. Asking for a model that was already trained with the
+same inputs returns the stored artifact instead of refitting.
+
+Layout (one folder per model, written atomically):
+    models/registry/<key>/model.joblib   the fitted model (uncompressed)
+    models/registry/<key>/meta.json      farm, version, params, metrics ...
+    models/registry/.lock                held while a model is registered
+
+Versions count up per farm in registration order; latest(farm) is what
+the prediction service (ml_serve) loads. Loads are plain reads: sklearn
+copies the tree arrays into its own buffers on unpickling, so a forest
+cannot stay memory-mapped.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ml_data import FEATURES
+from simulation_ml import train_and_evaluate
+
+REGISTRY_DIR = Path(__file__).parent / "models" / "registry"
+
+# parameters that do not change the fitted model
+IGNORED_PARAMS = {"n_jobs", "verbose", "timings"}
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+def data_fingerprint(*arrays):
+    """sha256 over shape, dtype and bytes of every array."""
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.shape}{a.dtype.str}".encode())
+        h.update(a.data)
+    return h.hexdigest()
+
+
+def model_key(farm, features, params, fingerprint):
+    spec = {
+        "farm": farm,
+        "features": list(features),
+        "params": {k: v for k, v in sorted(params.items()) if k not in IGNORED_PARAMS},
+        "data": fingerprint,
+    }
+    blob = json.dumps(spec, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()[:32]
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = Path(root)
+
+    def path(self, key):
+        return self.root / key
+
+    def entry(self, key):
+        """meta.json of a stored model, or None."""
+        try:
+            with open(self.path(key) / "meta.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def entries(self, farm=None):
+        if not self.root.exists():
+            return []
+        out = [self.entry(p.name) for p in self.root.iterdir() if p.is_dir()]
+        out = [e for e in out if e is not None and (farm is None or e["farm"] == farm)]
+        return sorted(out, key=lambda e: (e["farm"], e["version"]))
+
+    def latest(self, farm):
+        found = self.entries(farm)
+        return found[-1] if found else None
+
+    def load(self, key):
+        import joblib
+
+        return joblib.load(self.path(key) / "model.joblib")
+
+    def load_latest(self, farm):
+        e = self.latest(farm)
+        if e is None:
+            raise FileNotFoundError(f"no registered model for farm {farm}")
+        return self.load(e["key"])
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Exclusive lock on the registry (across processes)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def register(self, model, key, farm, features, params, fingerprint, metrics=None):
+        import joblib
+        import sklearn
+
+        # versions are counted from the published entries, so counting and
+        # publishing happen under one lock
+        with self.lock():
+            existing = self.entry(key)
+            if existing is not None:
+                return existing
+
+            meta = {
+                "key": key,
+                "farm": farm,
+                "version": len(self.entries(farm)) + 1,
+                "features": list(features),
+                "params": {k: v for k, v in params.items() if k not in IGNORED_PARAMS},
+                "data": fingerprint,
+                "metrics": metrics or {},
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "sklearn": sklearn.__version__,
+            }
+
+            tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=f".{key}."))
+            try:
+                joblib.dump(model, tmp / "model.joblib")
+                with open(tmp / "meta.json", "w") as f:
+                    json.dump(meta, f, indent=2, default=str)
+                os.replace(tmp, self.path(key))
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+        return meta
+
+    def get_or_train(self, farm, X_train, y_train, X_val, y_val, features=FEATURES,
+                     use_rf=True, random_state=42, **model_params):
+        """
+        Returns (model, meta, cached). Trains through
+        simulation_ml.train_and_evaluate only when no model with the same
+        key is stored yet.
+        """
+        params = dict(use_rf=use_rf, random_state=random_state, **model_params)
+        fingerprint = data_fingerprint(X_train, y_train, X_val, y_val)
+        key = model_key(farm, features, params, fingerprint)
+
+        meta = self.entry(key)
+        if meta is not None:
+            return self.load(key), meta, True
+
+        score, model = train_and_evaluate(X_train, y_train, X_val, y_val, **params)
+        meta = self.register(model, key, farm, features, params, fingerprint, {"rmse": score})
+        return model, meta, False
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    from ml_data import load_farm
+
+    reg = ModelRegistry()
+    X, y = load_farm(1).select(latest=True)
+    split = int(len(X) * 0.7)
+    for _ in range(2):
+        t0 = time.perf_counter()
+        model, meta, cached = reg.get_or_train(1, X[:split], y[:split], X[split:], y[split:])
+        print(f"v{meta['version']} key={meta['key']} cached={cached} "
+              f"rmse={meta['metrics']['rmse']:.4f} ({time.perf_counter() - t0:.2f}s)")
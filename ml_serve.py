@@ -0,0 +1,286 @@
+"""
+ml_serve.py
+
+Local prediction service for the seven wind farms.
+
+- asyncio HTTP/1.1 server on localhost (or a Unix socket), stdlib only
+- per-farm models are loaded once into an LRU cache
+- concurrent requests for the same farm are micro-batched into a single
+  model.predict call (up to max_batch rows or max_wait seconds)
+- GET /metrics reports request latency p50/p99 and batch sizes
+
+Endpoints:
+    POST /predict   {"farm": 1, "features": [[u, v, ws, wd], ...]}
+                    -> {"predictions": [...]}
+    GET  /metrics
+    GET  /health
+
+Models are the latest per-farm entries of the model registry
+(ml_registry); `python ml_serve.py --train` fits and registers them first.
+"""
+
+import argparse
+import asyncio
+import json
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from ml_data import FEATURES, N_FARMS, load_farm
+from ml_registry import REGISTRY_DIR, ModelRegistry
+
+
+# -----------------------------
+# Models from the registry
+# -----------------------------
+def load_model(farm, registry_dir=REGISTRY_DIR):
+    """Latest registered model of a farm."""
+    return ModelRegistry(registry_dir).load_latest(farm)
+
+
+def train_models(farms=range(1, 8), registry_dir=REGISTRY_DIR, split=0.9, **model_params):
+    """
+    Fits (or reuses) one registered model per farm, trained on the first
+    `split` of its rows and checked on the rest.
+    """
+    reg = ModelRegistry(registry_dir)
+    for farm in farms:
+        X, y = load_farm(farm).select()
+        cut = int(len(X) * split)
+        _, meta, cached = reg.get_or_train(farm, X[:cut], y[:cut], X[cut:], y[cut:], **model_params)
+        state = "reused" if cached else "trained"
+        print(f"farm {farm}: {state} v{meta['version']} (RMSE {meta['metrics']['rmse']:.4f})")
+
+
+# -----------------------------
+# LRU model cache
+# -----------------------------
+class ModelCache:
+    """Keeps up to `capacity` models; concurrent misses share one load."""
+
+    def __init__(self, loader=load_model, capacity=7):
+        self.loader = loader
+        self.capacity = capacity
+        self.models = OrderedDict()
+        self.loading = {}
+
+    async def get(self, key):
+        if key in self.models:
+            self.models.move_to_end(key)
+            return self.models[key]
+
+        if key not in self.loading:
+            loop = asyncio.get_running_loop()
+            self.loading[key] = loop.run_in_executor(None, self.loader, key)
+        try:
+            model = await self.loading[key]
+        finally:
+            self.loading.pop(key, None)
+
+        self.models[key] = model
+        self.models.move_to_end(key)
+        while len(self.models) > self.capacity:
+            self.models.popitem(last=False)
+        return model
+
+
+# -----------------------------
+# Micro-batching
+# -----------------------------
+class Batcher:
+    """One queue + worker task per farm; each batch is one predict call."""
+
+    def __init__(self, cache, max_batch=4096, max_wait=0.002, history=10000):
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queues = {}
+        self.workers = {}
+        self.batch_sizes = deque(maxlen=history)
+
+    async def predict(self, farm, X):
+        if farm not in self.queues:
+            self.queues[farm] = asyncio.Queue()
+            self.workers[farm] = asyncio.create_task(self._worker(farm))
+        fut = asyncio.get_running_loop().create_future()
+        await self.queues[farm].put((X, fut))
+        return await fut
+
+    async def _collect(self, queue):
+        items = [await queue.get()]
+        rows = len(items[0][0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while rows < self.max_batch:
+            if queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = queue.get_nowait()
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    async def _worker(self, farm):
+        queue = self.queues[farm]
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect(queue)
+            try:
+                model = await self.cache.get(farm)
+                X = np.vstack([x for x, _ in items])
+                preds = await loop.run_in_executor(None, model.predict, X)
+            except Exception as exc:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+
+            self.batch_sizes.append(len(X))
+            bounds = np.cumsum([len(x) for x, _ in items])[:-1]
+            for (_, fut), part in zip(items, np.split(preds, bounds)):
+                if not fut.done():
+                    fut.set_result(part)
+
+    async def close(self):
+        for task in self.workers.values():
+            task.cancel()
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+
+
+# -----------------------------
+# HTTP server
+# -----------------------------
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+class PredictionServer:
+    def __init__(self, loader=load_model, capacity=7, max_batch=4096, max_wait=0.002,
+                 history=10000):
+        self.batcher = Batcher(ModelCache(loader, capacity), max_batch, max_wait, history)
+        self.latencies = deque(maxlen=history)
+        self.requests = 0
+
+    def metrics(self):
+        lat = np.asarray(self.latencies) * 1000.0
+        sizes = np.asarray(self.batcher.batch_sizes)
+        return {
+            "requests": self.requests,
+            "latency_ms_p50": float(np.percentile(lat, 50)) if len(lat) else None,
+            "latency_ms_p99": float(np.percentile(lat, 99)) if len(lat) else None,
+            "batches": len(sizes),
+            "batch_size_mean": float(sizes.mean()) if len(sizes) else None,
+            "batch_size_max": int(sizes.max()) if len(sizes) else None,
+            "models_loaded": list(self.batcher.cache.models),
+        }
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return 200, self.metrics()
+        if method != "POST" or path != "/predict":
+            return 404, {"error": "not found"}
+
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        try:
+            req = json.loads(body)
+            farm = int(req["farm"])
+            X = np.asarray(req["features"], dtype=float)
+            if X.ndim == 1:
+                X = X[None, :]
+        except (ValueError, KeyError, TypeError) as exc:
+            return 400, {"error": str(exc)}
+        # checked here: a bad request must not fail the micro-batch it joins,
+        # and every farm number gets its own queue + worker task
+        if not 1 <= farm <= N_FARMS:
+            return 400, {"error": f"farm must be in 1..{N_FARMS}, got {farm}"}
+        if X.ndim != 2 or len(X) == 0 or X.shape[1] != len(FEATURES):
+            return 400, {"error": f"features must be a non-empty list of rows of "
+                                  f"{len(FEATURES)} values ({', '.join(FEATURES)})"}
+
+        try:
+            preds = await self.batcher.predict(farm, X)
+        except FileNotFoundError:
+            return 404, {"error": f"no model for farm {farm}"}
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+
+        self.requests += 1
+        self.latencies.append(loop.time() - t0)
+        return 200, {"predictions": preds.tolist()}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.route(method, path, body)
+
+                data = json.dumps(payload).encode()
+                keep = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                await self.batcher.close()
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wind power prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="serve on this Unix socket path instead of TCP")
+    parser.add_argument("--train", action="store_true", help="fit and register per-farm models first")
+    parser.add_argument("--max-batch", type=int, default=4096)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.train:
+        train_models()
+
+    server = PredictionServer(max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving on {where}")
+    asyncio.run(server.serve(args.host, args.port, args.unix))
@@ -0,0 +1,132 @@
+"""
+ml_submission.py
+
+Submission stage for the GEFCom2012 test set.
+
+For every id in data/test.csv (a target hour) each farm's prediction
+uses the most recent forecast available for that hour. Test hours are
+looked up in a per-farm target-time index with np.searchsorted, and each
+farm is predicted in one batched model.predict call. The result is
+written in benchmark.csv format (id, date, wp1..wp7) and scored against
+a reference submission with a vectorized multi-farm RMSE / MAE.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml_data import DATA_DIR, N_FARMS, load_farm, load_targets, parse_dates, read_table
+from ml_registry import ModelRegistry
+
+FARM_COLS = [f"wp{f}" for f in range(1, N_FARMS + 1)]
+
+
+# -----------------------------
+# Test ids
+# -----------------------------
+def load_ids(name="test.csv", data_dir=DATA_DIR):
+    """(ids, YYYYMMDDHH dates) of a test / benchmark file, sorted by id."""
+    cols = read_table(Path(data_dir) / name)
+    order = np.argsort(cols["id"], kind="stable")
+    return np.asarray(cols["id"])[order], np.asarray(cols["date"])[order]
+
+
+def lookup(keys, sorted_keys):
+    """Positions of `keys` in `sorted_keys`, -1 where missing."""
+    pos = np.searchsorted(sorted_keys, keys)
+    pos = np.minimum(pos, len(sorted_keys) - 1)
+    return np.where(sorted_keys[pos] == keys, pos, -1)
+
+
+# -----------------------------
+# Models
+# -----------------------------
+def farm_model(farm, data, registry=None, split=0.9, **model_params):
+    """Registered model trained on the latest forecast per observed hour."""
+    registry = registry or ModelRegistry()
+    X, y = data.select(latest=True)
+    cut = int(len(X) * split)
+    model, _, _ = registry.get_or_train(farm, X[:cut], y[:cut], X[cut:], y[cut:], **model_params)
+    return model
+
+
+# -----------------------------
+# Prediction
+# -----------------------------
+def predict_submission(models=None, data_dir=DATA_DIR, registry=None, **model_params):
+    """
+    Returns a DataFrame in benchmark format. `models` may map farm -> fitted
+    model; missing farms get farm_model(). Hours with no usable forecast
+    fall back to the farm's mean observed power.
+    """
+    ids, dates = load_ids("test.csv", data_dir)
+    hours = parse_dates(dates)
+    targets = load_targets(data_dir)
+    models = dict(models or {})
+
+    out = {"id": ids, "date": dates}
+    for farm in range(1, N_FARMS + 1):
+        data = load_farm(farm, data_dir, targets)
+        if farm in models:
+            model = models[farm]
+        else:
+            model = farm_model(farm, data, registry, **model_params)
+
+        idx = data.rows(latest=True, observed=False)
+        pos = lookup(hours, data.target[idx])
+        hit = pos >= 0
+
+        pred = np.full(len(ids), np.nanmean(targets[1][:, farm - 1]))
+        if hit.any():
+            # one predict per farm over the distinct hours that have a forecast
+            uniq, inv = np.unique(pos[hit], return_inverse=True)
+            pred[hit] = model.predict(data.X[idx[uniq]])[inv]
+        out[f"wp{farm}"] = np.clip(pred, 0.0, 1.0)
+
+    return pd.DataFrame(out)
+
+
+def write_submission(df, path="submission.csv"):
+    df.to_csv(path, index=False, float_format="%.4f")
+    return path
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def score_submission(sub, reference="benchmark.csv", data_dir=DATA_DIR):
+    """
+    Per-farm and overall RMSE / MAE of `sub` against a reference file in
+    the same format, matched on id.
+    """
+    ref_cols = read_table(Path(data_dir) / reference)
+    ref_ids = np.asarray(ref_cols["id"])
+    order = np.argsort(ref_ids, kind="stable")
+    ref_ids = ref_ids[order]
+    ref = np.column_stack([np.asarray(ref_cols[c])[order] for c in FARM_COLS]).astype(float)
+
+    pos = lookup(sub["id"].to_numpy(), ref_ids)
+    ok = pos >= 0
+    pred = sub[FARM_COLS].to_numpy(dtype=float)[ok]
+    err = pred - ref[pos[ok]]
+
+    table = pd.DataFrame({
+        "rmse": np.sqrt((err ** 2).mean(axis=0)),
+        "mae": np.abs(err).mean(axis=0),
+    }, index=FARM_COLS)
+    table.loc["all"] = [np.sqrt((err ** 2).mean()), np.abs(err).mean()]
+    return table
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    sub = predict_submission()
+    path = write_submission(sub)
+    print(f"Wrote {path} ({len(sub)} rows) in {time.perf_counter() - t0:.1f}s")
+    print(score_submission(sub))
@@ -0,0 +1,221 @@
+"""
+ml_sweep.py
+
+Hyperparameter sensitivity sweep for the wind power forest
+(max_depth x n_estimators x seed) on the GEFCom2012 data.
+
+- successive halving: every config is first trained on a small budget
+  of the most recent training rows; only the best 1 / eta (mean RMSE
+  over seeds) move on to the next, eta times larger budget, the last
+  rung being the full training split
+- trials run on a process pool, with cores split between workers and
+  forest threads as in ml_train
+- every (config, seed, budget) result is cached as one JSON file keyed
+  by its parameters and a fingerprint of the data, so rerunning (or
+  extending) a sweep only trains what is new
+
+plot_sensitivity() draws the measured bifurcation diagram (RMSE vs.
+max_depth, one point per seed, coloured by budget) used by images.py.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml_data import load_farm
+from ml_registry import data_fingerprint
+from ml_train import split_cores
+from simulation_ml import train_and_evaluate
+
+SWEEP_DIR = Path(__file__).parent / "models" / "sweep"
+
+PARAMS = ("max_depth", "n_estimators")
+
+
+# -----------------------------
+# Configs + budgets
+# -----------------------------
+def param_grid(max_depth=(2, 4, 6, 8, 10, 12, 15, None), n_estimators=(30, 70, 100)):
+    return [dict(zip(PARAMS, values)) for values in itertools.product(max_depth, n_estimators)]
+
+
+def budgets(n_train, n_rungs=3, eta=3):
+    """Training rows per rung: n_train / eta**(n_rungs - 1), ..., n_train."""
+    return [max(1, n_train // eta ** (n_rungs - 1 - r)) for r in range(n_rungs)]
+
+
+def trial_key(trial, budget, data):
+    spec = {"trial": trial, "budget": budget, "data": data}
+    blob = json.dumps(spec, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()[:32]
+
+
+# -----------------------------
+# One trial (runs in a worker)
+# -----------------------------
+@lru_cache(maxsize=4)
+def _split(farm, horizons, latest, split):
+    X, y = load_farm(farm).select(horizons=horizons, latest=latest)
+    cut = int(len(X) * split)
+    return X[:cut], y[:cut], X[cut:], y[cut:]
+
+
+def run_trial(trial, budget, data, inner_jobs=1):
+    """
+    Fits one forest on the last `budget` training rows and scores it on
+    the full validation split.
+    """
+    X_train, y_train, X_val, y_val = _split(data["farm"], data["horizons"], data["latest"],
+                                            data["split"])
+    params = {k: trial[k] for k in PARAMS}
+
+    timings = {}
+    score, _ = train_and_evaluate(X_train[-budget:], y_train[-budget:], X_val, y_val,
+                                  random_state=trial["seed"], timings=timings,
+                                  n_jobs=inner_jobs, **params)
+    return dict(trial, n_train=budget, rmse=score, fit_s=timings.get("fit"))
+
+
+def _run(args):
+    return run_trial(*args)
+
+
+# -----------------------------
+# Per-trial cache
+# -----------------------------
+def load_result(cache_dir, key):
+    if cache_dir is None:
+        return None
+    try:
+        with open(Path(cache_dir) / f"{key}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_result(cache_dir, key, row):
+    if cache_dir is None:
+        return
+    path = Path(cache_dir) / f"{key}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(row, f)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Successive halving driver
+# -----------------------------
+def run_sweep(configs=None, seeds=(0, 1, 2), farm=1, horizons=None, latest=True, split=0.7,
+              n_rungs=3, eta=3, cache_dir=SWEEP_DIR, cores=None):
+    """
+    Returns a DataFrame with one row per trial run:
+    max_depth, n_estimators, seed, rung, n_train, rmse, fit_s, cached.
+    """
+    configs = param_grid() if configs is None else [dict(c) for c in configs]
+    horizons = None if horizons is None else tuple(horizons)
+
+    X_train, y_train, X_val, y_val = _split(farm, horizons, latest, split)
+    data = {"farm": farm, "horizons": horizons, "latest": latest, "split": split,
+            "fingerprint": data_fingerprint(X_train, y_train, X_val, y_val)}
+
+    rows = []
+    alive = configs
+    for rung, budget in enumerate(budgets(len(X_train), n_rungs, eta)):
+        trials = [dict(cfg, seed=s) for cfg in alive for s in seeds]
+        keys = [trial_key(t, budget, data) for t in trials]
+
+        results = [load_result(cache_dir, k) for k in keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        workers, inner = split_cores(len(todo), cores)
+        args = [(trials[i], budget, data, inner) for i in todo]
+        if workers == 1:
+            fresh = [_run(a) for a in args]
+        elif args:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fresh = list(pool.map(_run, args))
+        else:
+            fresh = []
+        for i, row in zip(todo, fresh):
+            save_result(cache_dir, keys[i], row)
+            results[i] = row
+
+        rows += [dict(r, rung=rung, cached=i not in todo) for i, r in enumerate(results)]
+
+        # keep the best 1 / eta configs by mean RMSE over seeds
+        scores = {}
+        for t, r in zip(trials, results):
+            scores.setdefault(tuple(t[k] for k in PARAMS), []).append(r["rmse"])
+        ranked = sorted(alive, key=lambda c: np.mean(scores[tuple(c[k] for k in PARAMS)]))
+        alive = ranked[:max(1, math.ceil(len(alive) / eta))]
+
+    return pd.DataFrame(rows)
+
+
+def tree_table(df):
+    """Mean / std RMSE over seeds per n_estimators on the largest budget."""
+    last = df[df["rung"] == df["rung"].max()]
+    return last.groupby("n_estimators")["rmse"].agg(["mean", "std", "count"])
+
+
+# -----------------------------
+# Bifurcation diagram from a sweep
+# -----------------------------
+def plot_sensitivity(df, path="plots/ml_bifurcation.png"):
+    """
+    RMSE vs. max_depth, one point per (n_estimators, seed), one colour
+    per budget. max_depth=None (fully grown trees) is drawn right of the
+    deepest finite depth.
+    """
+    import matplotlib.pyplot as plt
+
+    depths = sorted(d for d in df["max_depth"].unique() if d is not None and not pd.isna(d))
+    none_x = (depths[-1] if depths else 0) + 3
+    x = df["max_depth"].map(lambda d: none_x if d is None or pd.isna(d) else d).astype(float)
+    # small offset per n_estimators so the seeds of each config stay visible
+    n_est = sorted(df["n_estimators"].unique())
+    x = x + df["n_estimators"].map({n: 0.25 * (i - (len(n_est) - 1) / 2)
+                                    for i, n in enumerate(n_est)})
+
+    plt.figure(figsize=(10, 6))
+    for rung, part in df.groupby("rung"):
+        plt.plot(x[part.index], part["rmse"], ".", markersize=8, alpha=0.7,
+                 label=f"{int(part['n_train'].iloc[0])} training rows")
+
+    best = df[df["rung"] == df["rung"].max()]["rmse"].min()
+    plt.axhline(y=best, color="purple", linestyle=":", linewidth=1.5,
+                label=f"Best measured RMSE ({best:.4f})")
+
+    plt.xticks(depths + [none_x], [str(int(d)) for d in depths] + ["None"])
+    plt.title("Bifurcation Diagram: RMSE vs. Max Depth Parameter", fontsize=14, fontweight="bold")
+    plt.xlabel("Max Depth Parameter", fontsize=12)
+    plt.ylabel("Validation RMSE", fontsize=12)
+    plt.grid(True, linestyle="--", alpha=0.7)
+    plt.legend(loc="best", fontsize=9)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches="tight")
+    plt.close()
+    return path
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    import time
+
+    t0 = time.perf_counter()
+    df = run_sweep()
+    print(df.groupby("rung")[["n_train", "fit_s"]].agg({"n_train": "first", "fit_s": "sum"}))
+    print(tree_table(df))
+    print("Saved:", plot_sensitivity(df))
+    print(f"Total wall time: {time.perf_counter() - t0:.1f}s")
@@ -7,12 +7,19 @@ Rules:
 - optional noise flips states randomly
 """
 
+import hashlib
+from collections import deque
+
 import numpy as np
 from scipy.signal import convolve2d
 
+from ca_packed import pack
+from instrument import span, traced
+
 # -----------------------------
 # One step of CA evolution
 # -----------------------------
+@traced("ca.step")
 def step(grid, thresh=3, p_noise=0.02):
     kernel = np.ones((3, 3))
     neigh = convolve2d(grid, kernel, mode="same", boundary="wrap") - grid
@@ -20,23 +27,128 @@ def step(grid, thresh=3, p_noise=0.02):
 
     # random noise flip
     if p_noise > 0:
-        noise = (np.random.rand(*grid.shape) < p_noise).astype(int)
-        new = np.logical_xor(new, noise).astype(int)
+        with span("ca.noise", cells=grid.size):
+            noise = (np.random.rand(*grid.shape) < p_noise).astype(int)
+            new = np.logical_xor(new, noise).astype(int)
 
     return new
 
 # -----------------------------
-# Run CA for N steps
+# Stream CA generations lazily
 # -----------------------------
-def run_ca(initial_grid, steps=40, thresh=3, p_noise=0.02):
-    grids = [initial_grid.copy()]
+def iter_ca(initial_grid, steps=40, thresh=3, p_noise=0.02):
+    """
+    Yields the initial grid and then each of the `steps` generations.
+    Only the current generation is kept alive, so memory stays constant.
+    """
     g = initial_grid.copy()
+    yield g
 
     for _ in range(steps):
         g = step(g, thresh, p_noise)
-        grids.append(g.copy())
+        yield g
+
+# -----------------------------
+# Online statistics over a run
+# -----------------------------
+class RunningStats:
+    """
+    Running accumulators fed one generation at a time:
+    - visits:  per-cell count of generations the cell was alive
+    - flips:   per-cell count of state changes between generations
+    - density: live-cell fraction of every generation seen
+    """
+
+    def __init__(self, shape):
+        self.visits = np.zeros(shape, dtype=np.int64)
+        self.flips = np.zeros(shape, dtype=np.int64)
+        self.density = []
+        self.prev = None
+        # set by run_ca_stats(detect_cycles=True)
+        self.transient = None
+        self.period = None
+        self.stopped_at = None
+
+    def update(self, grid):
+        self.visits += grid
+        if self.prev is not None:
+            self.flips += grid != self.prev
+        self.density.append(grid.mean())
+        self.prev = grid
+
+    def extend_cycle(self, grid, remaining, period, thresh=3):
+        """
+        Accounts for `remaining` more generations of a noise-free run that
+        has entered a cycle of length `period` starting at `grid`, without
+        stepping through them one by one.
+        """
+        cycle = [grid]
+        for _ in range(period - 1):
+            cycle.append(step(cycle[-1], thresh, 0))
+
+        full, rest = divmod(remaining, period)
+        for j, g in enumerate(cycle):
+            n = full + (j < rest)
+            if n:
+                self.visits += n * g
+                self.flips += n * (g != cycle[j - 1])
+
+        dens = [g.mean() for g in cycle]
+        self.density.extend((dens * (full + 1))[:remaining])
+        self.prev = cycle[(remaining - 1) % period]
+
+    @property
+    def generations(self):
+        return len(self.density)
 
-    return grids
+
+def state_key(grid):
+    words = pack(grid)
+    return hashlib.blake2b(words.tobytes(), digest_size=16).digest(), words
+
+
+def run_ca_stats(initial_grid, steps=40, thresh=3, p_noise=0.02,
+                 detect_cycles=False, max_period=64):
+    """
+    Streams a run through RunningStats instead of storing every grid.
+
+    With detect_cycles=True and p_noise=0 the last `max_period` packed
+    generations are kept in a hash table. Once a generation repeats, the
+    run stops; stats.transient / stats.period record where the cycle
+    starts and its length (1 = fixed point), and the statistics for the
+    remaining steps are filled in from one pass over the cycle.
+    """
+    stats = RunningStats(initial_grid.shape)
+    if not detect_cycles or p_noise > 0:
+        for g in iter_ca(initial_grid, steps, thresh, p_noise):
+            stats.update(g)
+        return stats
+
+    seen = {}
+    order = deque()
+    for t, g in enumerate(iter_ca(initial_grid, steps, thresh, p_noise)):
+        key, words = state_key(g)
+        hit = seen.get(key)
+        if hit is not None and np.array_equal(hit[1], words):
+            stats.transient = hit[0]
+            stats.period = t - hit[0]
+            stats.stopped_at = t
+            stats.extend_cycle(g, steps + 1 - t, stats.period, thresh)
+            break
+
+        stats.update(g)
+        seen[key] = (t, words)
+        order.append(key)
+        if len(order) > max_period:
+            del seen[order.popleft()]
+
+    return stats
+
+# -----------------------------
+# Run CA for N steps
+# -----------------------------
+def run_ca(initial_grid, steps=40, thresh=3, p_noise=0.02):
+    return list(iter_ca(initial_grid, steps, thresh, p_noise))
 
 # -----------------------------
 # Demo
@@ -6,8 +6,12 @@ Uses scikit-learn RandomForest if available.
 Replace load_data() path with your real GEFCom2012 dataset location.
 """
 
+import time
+
 import numpy as np
-import pandas as pd
+
+from instrument import array_attrs, span
+from ml_data import load_farm
 
 # -----------------------------
 # Utility: RMSE
@@ -18,63 +22,149 @@ def rmse(y_true, y_pred):
 # -----------------------------
 # Load dataset
 # -----------------------------
-def load_data(farm=1):
+def load_data(farm=1, horizons=None, latest=False):
     """
     Loads real GEFCom2012 data for a given wind farm (1–7).
 
     farm=1 → uses wp1 and windforecast_wf1.csv
     farm=2 → uses wp2 and windforecast_wf2.csv
     ...
-    """
 
-    # 1. Load targets (train.csv)
-    df_train = pd.read_csv("data/train.csv")
+    Each forecast row is matched to the power observed at its target
+    hour (issue date + hors), see ml_data. Rows come back in target-time
+    order; rows without an observation or with missing features are
+    dropped.
 
-    # target column (wp1, wp2, ..., wp7)
-    target_col = f"wp{farm}"
-    y = df_train[target_col].values
+    horizons → optional subset of forecast horizons (1–48)
+    latest   → keep only the most recent forecast per target hour
+    """
+    data = load_farm(farm)
 
-    # 2. Load weather forecasts for same farm
-    df_wf = pd.read_csv(f"data/windforecasts_wf{farm}.csv")
+    # Features used: u, v, ws, wd (derived features: ml_features.FeaturePipeline)
+    X, y = data.select(horizons=horizons, latest=latest)
 
-    # Features used: u, v, ws, wd (you can add more later)
-    X = df_wf[["u", "v", "ws", "wd"]].values
+    return X, y
 
-    # Ensure shapes match
-    n = min(len(X), len(y))
-    X = X[:n]
-    y = y[:n]
 
-    return X, y
+# -----------------------------
+# Streaming linear model (numpy fallback)
+# -----------------------------
+class StreamingLinear:
+    """
+    Least-squares linear regression from running normal equations.
 
+    X'X and X'y (with the intercept handled through running sums, so no
+    column of ones is ever stacked onto X) are accumulated chunk by chunk,
+    which lets it fit data that never fits in memory at once. Chunks can
+    also be removed again (downdate) for sliding windows. Plain numpy
+    attributes only, so the model pickles cleanly.
+    """
+
+    def __init__(self, ridge=0.0):
+        self.ridge = ridge
+        self.n = 0
+        self.sx = None      # sum of X rows
+        self.sy = 0.0       # sum of y
+        self.xtx = None     # X'X
+        self.xty = None     # X'y
+        self.coef_ = None
+        self.intercept_ = 0.0
+        self._dirty = False
+
+    def _accumulate(self, X, y, sign):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(X) == 0:
+            return self
+        if self.xtx is None:
+            p = X.shape[1]
+            self.sx = np.zeros(p)
+            self.xtx = np.zeros((p, p))
+            self.xty = np.zeros(p)
+        self.n += sign * len(X)
+        self.sx += sign * X.sum(axis=0)
+        self.sy += sign * y.sum()
+        self.xtx += sign * (X.T @ X)
+        self.xty += sign * (X.T @ y)
+        self._dirty = True
+        return self
+
+    def partial_fit(self, X, y):
+        return self._accumulate(X, y, 1)
+
+    def downdate(self, X, y):
+        return self._accumulate(X, y, -1)
+
+    def fit(self, X, y, chunk_size=65536):
+        self.__init__(self.ridge)
+        for i in range(0, len(X), chunk_size):
+            self.partial_fit(X[i:i + chunk_size], y[i:i + chunk_size])
+        return self
+
+    def fit_chunks(self, chunks):
+        """Fits from an iterable of (X, y) chunks, e.g. read from disk."""
+        self.__init__(self.ridge)
+        for X, y in chunks:
+            self.partial_fit(X, y)
+        return self
+
+    def solve(self):
+        # centre the normal equations: the intercept drops out
+        mx = self.sx / self.n
+        my = self.sy / self.n
+        cxx = self.xtx - self.n * np.outer(mx, mx)
+        cxy = self.xty - self.n * mx * my
+        cxx[np.diag_indices_from(cxx)] += self.ridge
+        self.coef_ = np.linalg.lstsq(cxx, cxy, rcond=None)[0]
+        self.intercept_ = my - mx @ self.coef_
+        self._dirty = False
+        return self
+
+    def predict(self, X):
+        if self._dirty:
+            self.solve()
+        return np.asarray(X, dtype=float) @ self.coef_ + self.intercept_
 
 # -----------------------------
 # Train + Evaluate model
 # -----------------------------
-def train_and_evaluate(X_train, y_train, X_val, y_val, use_rf=True, random_state=42):
+def train_and_evaluate(X_train, y_train, X_val, y_val, use_rf=True, random_state=42,
+                       timings=None, **model_params):
+    """
+    Fits a model and returns (validation RMSE, model).
+
+    model_params are passed to RandomForestRegressor (defaults:
+    n_estimators=70). If a `timings` dict is given, fit and predict
+    wall-clock seconds are stored in it under "fit" and "predict".
+    StreamingLinear is used only when scikit-learn is not installed.
+    """
     try:
         if use_rf:
             from sklearn.ensemble import RandomForestRegressor
-            model = RandomForestRegressor(n_estimators=70, random_state=random_state)
         else:
             from sklearn.linear_model import LinearRegression
+    except ImportError:
+        # Fallback linear regression (streaming normal equations)
+        model = StreamingLinear()
+    else:
+        if use_rf:
+            params = dict(n_estimators=70, random_state=random_state)
+            params.update(model_params)
+            model = RandomForestRegressor(**params)
+        else:
             model = LinearRegression()
 
+    # bad hyperparameters and fit errors propagate
+    t0 = time.perf_counter()
+    with span("fit", model=type(model).__name__, **array_attrs("X", X_train)):
         model.fit(X_train, y_train)
+    t1 = time.perf_counter()
+    with span("predict", **array_attrs("X", X_val)):
         preds = model.predict(X_val)
-        return rmse(y_val, preds), model
-
-    except Exception:
-        # Fallback linear regression (numpy lstsq)
-        X_design = np.hstack([np.ones((X_train.shape[0], 1)), X_train])
-        coef, *_ = np.linalg.lstsq(X_design, y_train, rcond=None)
-
-        def predict(X):
-            Xd = np.hstack([np.ones((X.shape[0], 1)), X])
-            return Xd.dot(coef)
-
-        preds = predict(X_val)
-        return rmse(y_val, preds), ("linear_coef", coef)
+    t2 = time.perf_counter()
+    if timings is not None:
+        timings.update(fit=t1 - t0, predict=t2 - t1)
+    return rmse(y_val, preds), model
 
 # -----------------------------
 # Demo
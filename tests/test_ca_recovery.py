@@ -0,0 +1,17 @@
+import math
+
+from ca_recovery import recovery_experiment
+
+
+def test_failure_recovers_to_live_steady_state():
+    row = recovery_experiment(p_noise=0.02, domains=1, seed=0)
+    # a live steady state, not the noise floor
+    assert row["baseline_density"] > 0.5
+    assert row["perturbed_density"] < row["baseline_density"] - 0.03
+    assert 0 < row["recovery_time"] < math.inf
+    assert row["final_damage"] < row["injected"]
+
+
+def test_isolated_domains_recover_too():
+    row = recovery_experiment(p_noise=0.05, domains=4, seed=1)
+    assert 0 < row["recovery_time"] < math.inf
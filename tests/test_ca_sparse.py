@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from ca_sparse import SparseCA
+from simulation_ca import step
+
+
+@pytest.mark.parametrize("shape, tile", [((100, 100), 64), ((67, 45), 8), ((61, 67), 8),
+                                         ((128, 128), 64), ((5, 70), 64)])
+def test_matches_simulation_ca_every_step(shape, tile):
+    grid = (np.random.default_rng(0).random(shape) < 0.18).astype(int)
+    ca = SparseCA(grid, thresh=3, p_noise=0, tile=tile)
+    ref = grid
+    for _ in range(10):
+        ref = step(ref, thresh=3, p_noise=0)
+        np.testing.assert_array_equal(ca.step(), ref)